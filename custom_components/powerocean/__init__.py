@@ -5,8 +5,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr
 
-from .const import DOMAIN, PLATFORMS, _LOGGER, DOMAIN, ISSUE_URL_ERROR_MESSAGE, STARTUP_MESSAGE
-from .ecoflow import Ecoflow
+from .const import DOMAIN, PARAMETER_PLATFORMS, PLATFORMS, _LOGGER, DOMAIN, ISSUE_URL_ERROR_MESSAGE, STARTUP_MESSAGE
 
 
 _LOGGER.info(STARTUP_MESSAGE)
@@ -14,12 +13,16 @@ _LOGGER.info(STARTUP_MESSAGE)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up PowerOcean from a config entry."""
+    # The API client is imported on first setup, not when the integration is loaded
+    from .commands import CommandQueue
+    from .ecoflow import Ecoflow, get_account_budget
 
     # Setup DOMAIN as default
     hass.data.setdefault(DOMAIN, {})
 
-    # Setup device specific sensor list (used in updates) on HASS so it is available within integration (reuqired for unload)
-    hass.data[DOMAIN]["device_specific_sensors"] = {}
+    # Setup device specific sensor lists (used in updates) on HASS so they are available within integration (reuqired for unload)
+    # Shared by all entries, each entry keeps its list under its entry_id
+    hass.data[DOMAIN].setdefault("device_specific_sensors", {})
 
     # Store an instance of the API instance in hass.data[domain]
     user_input = entry.data["user_input"]        # This user_input object was stored after the device
@@ -27,15 +30,35 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     device_info = entry.data.get("device_info")  # This device_info object was stored after the device
                                                  # was setup and has the name and serial needed etc.
     options = entry.data["options"]              # These are the options during setup, including custom device name
-    ecoflow = Ecoflow(user_input["serialnumber"], user_input["username"], user_input["password"])
+    # Reuse the instance authenticated by the config flow, if it was set up right after
+    ecoflow = hass.data[DOMAIN].get("probes", {}).pop(user_input["serialnumber"], None)
+    if ecoflow is None or (ecoflow.ecoflow_username, ecoflow.ecoflow_password) != (
+        user_input["username"], user_input["password"]
+    ):
+        ecoflow = Ecoflow(user_input["serialnumber"], user_input["username"], user_input["password"])
 
     if device_info:
         ecoflow.device = device_info   # Store the device information
         ecoflow.options = options      # Store the options
     hass.data[DOMAIN][entry.entry_id] = ecoflow
 
+    # All entries of an account share its request budget, split between them
+    ecoflow.budget = get_account_budget(hass, user_input["username"])
+    ecoflow.budget.register(ecoflow.sn)
+    entry.async_on_unload(lambda: ecoflow.budget.unregister(ecoflow.sn))
+
+    # Close the kept-alive HTTP connection of the instance on unload, a reload creates a new one
+    async def async_close():
+        await hass.async_add_executor_job(ecoflow.close)
+
+    entry.async_on_unload(async_close)
+
+    # Queue for the control commands of the number, select and switch platforms
+    ecoflow.commands = CommandQueue(hass, ecoflow)
+    entry.async_on_unload(ecoflow.commands.async_cancel)
+
     # Forward to sensor platform
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    await hass.config_entries.async_forward_entry_setups(entry, _platforms(ecoflow))
 
     # Get the device registry
     device_registry = dr.async_get(hass)
@@ -54,6 +77,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             name=options.get("custom_device_name"),  # Custom device name from user step 2 (options)
             model=device_info.get("product"),
             sw_version=device_info.get("version"),
+            hw_version=device_info.get("build"),
             configuration_url="https://api-e.ecoflow.com",
             suggested_area="Boiler Room",
         )
@@ -61,10 +85,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+def _platforms(ecoflow):
+    """Platforms of an entry: the number, select and switch platforms only with an endpoint for the changes."""
+    return PLATFORMS + PARAMETER_PLATFORMS if ecoflow.url_user_set is not None else PLATFORMS
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload all platforms associated with this entry
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    ecoflow = hass.data[DOMAIN][entry.entry_id]
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, _platforms(ecoflow))
 
     if unload_ok:
         # Clean up hass.data if any reference exists
@@ -73,8 +103,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # Additionally, clear the device-specific sensors list if it exists
         device_id = entry.data.get("device_info").get("serial")
         device_name = entry.data.get("options").get("custom_device_name")
-        if device_id in hass.data.get(DOMAIN, {}).get("device_specific_sensors", {}):
-            hass.data[DOMAIN]["device_specific_sensors"].pop(device_id, None)
+        if entry.entry_id in hass.data.get(DOMAIN, {}).get("device_specific_sensors", {}):
+            hass.data[DOMAIN]["device_specific_sensors"].pop(entry.entry_id, None)
             _LOGGER.debug(
                 f"{device_id}: Cleared sensor update list for device with custom name '{device_name}'"
             )
@@ -82,5 +112,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the last data of a removed config entry."""
+    hass.data.get(DOMAIN, {}).get("snapshots", {}).pop(entry.entry_id, None)
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     await hass.config_entries.async_reload(entry.entry_id)
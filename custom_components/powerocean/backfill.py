@@ -0,0 +1,143 @@
+"""backfill.py: hourly statistics of the energy counters across gaps in the data (see powerocean_core/backfill.py).
+
+During a cloud outage the recorder compiles the last value for each hour; after a downtime of
+Home Assistant the hours are missing. Either way the whole jump of a counter lands in the hour
+the data returns. Once the recorder has compiled the hours of the gap, their rows are replaced
+(or added) with the interpolated values, keeping the sums consistent with the rows around them.
+"""
+
+import math
+from functools import partial
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    get_last_statistics,
+    get_metadata,
+    statistics_during_period,
+)
+from homeassistant.core import callback
+from homeassistant.exceptions import IntegrationError
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import _LOGGER, BACKFILL_DELAY, DOMAIN
+from .powerocean_core.backfill import HOUR, counters, hourly_values
+
+
+def _same(a, b):
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+
+
+def _statistics_bases(hass, statistic_ids, start, before):
+    """Return {statistic_id: (gap start, value, sum)} from the rows before the gap (executor).
+
+    After an outage the gap starts at start, with the values of before; the row of the hour
+    containing start must still show that value (it is not, if e.g. the stream kept the sensor
+    updated). After a downtime (before is None) the gap starts at the end of the last row.
+    """
+    bases = {}
+    for statistic_id, unique_id in statistic_ids.items():
+        if before is None:
+            rows = get_last_statistics(hass, 1, statistic_id, False, {"state", "sum"}).get(statistic_id)
+            if rows and rows[0]["state"] is not None and rows[0]["sum"] is not None:
+                bases[statistic_id] = (rows[0]["start"] + HOUR, rows[0]["state"], rows[0]["sum"])
+            continue
+
+        endpoint = before.get(unique_id)
+        try:
+            value = float(endpoint.value)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        hour = math.ceil(start / HOUR) * HOUR - HOUR  # the row which ends at or after start
+        rows = statistics_during_period(
+            hass, dt_util.utc_from_timestamp(hour), dt_util.utc_from_timestamp(hour + HOUR),
+            {statistic_id}, "hour", None, {"state", "sum"},
+        ).get(statistic_id)
+        if rows and rows[0]["state"] is not None and rows[0]["sum"] is not None and _same(rows[0]["state"], value):
+            bases[statistic_id] = (start, value, rows[0]["sum"])
+    return bases
+
+
+class StatisticsBackfill:
+    """Backfill of the hourly statistics of one config entry, run after the hours of a gap are compiled."""
+
+    def __init__(self, hass, ecoflow):
+        self.hass = hass
+        self.ecoflow = ecoflow
+        self._pending = set()  # cancel callbacks of the scheduled runs
+
+    @callback
+    def async_schedule(self, after, start=None, before=None):
+        """Schedule the backfill of the gap ending now, from start with the endpoints before (None: downtime)."""
+        end = dt_util.utcnow().timestamp()
+        run_at = dt_util.utc_from_timestamp(math.floor(end / HOUR) * HOUR + BACKFILL_DELAY)
+
+        async def async_run(_now):
+            self._pending.discard(cancel)
+            try:
+                await self.async_backfill(after, end, start, before)
+            except Exception as error:  # never let the statistics break the polling
+                _LOGGER.warning(f"{self.ecoflow.sn}: Backfill of the statistics failed: {error}")
+
+        cancel = async_track_point_in_utc_time(self.hass, async_run, max(run_at, dt_util.utcnow()))
+        self._pending.add(cancel)
+
+    @callback
+    def async_cancel(self):
+        """Cancel the scheduled runs, on unload."""
+        while self._pending:
+            self._pending.pop()()
+
+    async def async_backfill(self, after, end, start=None, before=None):
+        """Import the interpolated hourly statistics of the counters in after; return the number of rows."""
+        hass = self.hass
+        if "recorder" not in hass.config.components:
+            return 0
+
+        registry = entity_registry.async_get(hass)
+        periods = counters(after)
+        statistic_ids = {}  # entity_id -> unique_id
+        for unique_id in periods:
+            entity_id = registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+            if entity_id is not None:
+                statistic_ids[entity_id] = unique_id
+        if not statistic_ids:
+            return 0
+
+        instance = get_instance(hass)
+        metadata = await instance.async_add_executor_job(partial(get_metadata, hass, statistic_ids=set(statistic_ids)))
+        bases = await instance.async_add_executor_job(_statistics_bases, hass, statistic_ids, start, before)
+        gaps = [base[0] for base in bases.values() if math.floor(end / HOUR) * HOUR - base[0] > 0]
+        if not gaps:
+            return 0
+
+        history = {}
+        try:
+            history = await hass.async_add_executor_job(self.ecoflow.fetch_history, min(gaps), end)
+        except IntegrationError as error:
+            _LOGGER.debug(f"{self.ecoflow.sn}: No counter history, interpolating the gap: {error}")
+
+        tz = self.ecoflow.timezone or dt_util.DEFAULT_TIME_ZONE
+        imported = 0
+        for statistic_id, (gap_start, value, base_sum) in bases.items():
+            unique_id = statistic_ids[statistic_id]
+            meta = metadata.get(statistic_id, (None, None))[1]
+            if meta is None or not meta["has_sum"] or meta["unit_of_measurement"] != after[unique_id].unit:
+                continue
+            hours = hourly_values(
+                gap_start, value, end, after[unique_id].value, history.get(unique_id, ()), periods[unique_id], tz
+            )
+            if not hours:
+                continue
+            async_import_statistics(hass, meta, [
+                {"start": dt_util.utc_from_timestamp(hour), "state": state, "sum": base_sum + state - value}
+                for hour, state in hours
+            ])
+            imported += len(hours)
+            _LOGGER.debug(f"{self.ecoflow.sn}: {statistic_id}: {len(hours)} hours of statistics filled in")
+
+        if imported:
+            _LOGGER.info(f"{self.ecoflow.sn}: Filled in {imported} hourly statistics of the energy counters")
+        return imported
@@ -0,0 +1,162 @@
+"""binary_sensor.py: Binary sensors for the PowerOcean integration."""
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    ATTR_DATA_AGE,
+    ATTR_FAILURES,
+    ATTR_RETRY_IN,
+    SIGNAL_UPDATE,
+)
+from .ecoflow import Ecoflow
+from .powerocean_core.faults import describe_faults
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    # Retrieve the API instance from the config_entry data
+    ecoflow = hass.data[DOMAIN][config_entry.entry_id]
+
+    async_add_entities([PowerOceanAvailabilitySensor(ecoflow, config_entry.entry_id)])
+
+    # One problem sensor per inverter, added once its serial is known from a poll
+    problem_serials = set()
+
+    @callback
+    def async_add_problem_sensors():
+        new_serials = [serial for serial in ecoflow.faults if serial not in problem_serials]
+        if new_serials:
+            problem_serials.update(new_serials)
+            async_add_entities(
+                [PowerOceanProblemSensor(ecoflow, config_entry.entry_id, serial) for serial in new_serials]
+            )
+
+    async_add_problem_sensors()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_UPDATE.format(config_entry.entry_id), async_add_problem_sensors)
+    )
+
+
+class PowerOceanAvailabilitySensor(BinarySensorEntity):
+    """Availability of the Ecoflow cloud for one PowerOcean system."""
+
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, ecoflow: Ecoflow, entry_id):
+        """Initialize the sensor."""
+        self.ecoflow = ecoflow
+        self._entry_id = entry_id
+        self._attr_unique_id = f"{ecoflow.device['serial']}_cloud_available"
+        self._attr_name = "cloud_available"
+        self._written = None  # last written (state, failures), to skip identical writes
+
+    @property
+    def is_on(self):
+        """Return True while data is fetched successfully."""
+        return self.ecoflow.last_success is not None and self.ecoflow.stale_since is None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the age of the data, only while it is stale."""
+        if self.is_on:
+            return None
+
+        breaker = self.ecoflow.breaker
+        attr = {
+            ATTR_FAILURES: breaker.failures,
+            ATTR_RETRY_IN: breaker.retry_in(),
+        }
+        if self.ecoflow.last_success is not None:
+            attr[ATTR_DATA_AGE] = round((dt_util.utcnow() - self.ecoflow.last_success).total_seconds())
+
+        return attr
+
+    @property
+    def device_info(self):
+        """Return device specific attributes."""
+        return {
+            "identifiers": {(DOMAIN, self.ecoflow.device["serial"])},
+            "name": self.ecoflow.device["name"],
+            "manufacturer": "ECOFLOW",
+        }
+
+    async def async_added_to_hass(self):
+        """Call when the sensor is added to Home Assistant."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_UPDATE.format(self._entry_id), self._async_handle_update)
+        )
+        self.async_write_ha_state()
+
+    @callback
+    def _async_handle_update(self):
+        # Only write on transitions and failed retries, an outage costs no writes per tick
+        written = (self.is_on, self.ecoflow.breaker.failures)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
+
+
+class PowerOceanProblemSensor(BinarySensorEntity):
+    """Active faults of one PowerOcean inverter, decoded from the error reports."""
+
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, ecoflow: Ecoflow, entry_id, serial):
+        """Initialize the sensor."""
+        self.ecoflow = ecoflow
+        self._entry_id = entry_id
+        self._serial = serial
+        self._attr_unique_id = f"{serial}_problem"
+        role = "_master" if serial == getattr(ecoflow, "master_sn", None) else "_slave"
+        self._attr_name = f"problem{role}"
+        self._written = None  # last written faults, to skip identical writes
+
+    @property
+    def _faults(self):
+        return self.ecoflow.faults.get(self._serial, {})
+
+    @property
+    def is_on(self):
+        """Return True if any module of the inverter has an active fault."""
+        return any(self._faults.values())
+
+    @property
+    def extra_state_attributes(self):
+        """Return the active faults per module, and their descriptions."""
+        attributes = {module: sorted(codes, key=str) for module, codes in self._faults.items() if codes}
+        if attributes:
+            attributes["descriptions"] = describe_faults(self._faults)
+        return attributes
+
+    @property
+    def device_info(self):
+        """Return device specific attributes."""
+        return {
+            "identifiers": {(DOMAIN, self.ecoflow.device["serial"])},
+            "name": self.ecoflow.device["name"],
+            "manufacturer": "ECOFLOW",
+        }
+
+    async def async_added_to_hass(self):
+        """Call when the sensor is added to Home Assistant."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_UPDATE.format(self._entry_id), self._async_handle_update)
+        )
+        self._async_handle_update()
+
+    @callback
+    def _async_handle_update(self):
+        # The fault sets are frozensets, only write when they changed
+        if self._faults != self._written:
+            self._written = self._faults
+            self.async_write_ha_state()
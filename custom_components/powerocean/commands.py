@@ -0,0 +1,147 @@
+"""commands.py: queue of control commands (settable parameters) for the PowerOcean."""
+
+import time
+
+from homeassistant.core import callback
+from homeassistant.exceptions import IntegrationError
+
+from .const import _LOGGER, COMMAND_DELAY, COMMAND_CONFIRM_TIMEOUT, ISSUE_URL_ERROR_MESSAGE
+
+
+# Settable parameters: the report they are confirmed against, the platform and its settings
+WRITABLE_PARAMETERS = {
+    "emsCtrlLedBright": {
+        "report": "JTS1_EMS_CHANGE_REPORT",
+        "platform": "number",
+        "min": 0,
+        "max": 100,
+        "step": 1,
+        "unit": "%",
+        "icon": "mdi:led-on",
+    },
+    "sysBatChgUpLimit": {
+        "report": "JTS1_EMS_CHANGE_REPORT",
+        "platform": "number",
+        "min": 50,
+        "max": 100,
+        "step": 1,
+        "unit": "%",
+        "icon": "mdi:battery-arrow-up",
+    },
+    "sysBatDsgDownLimit": {
+        "report": "JTS1_EMS_CHANGE_REPORT",
+        "platform": "number",
+        "min": 0,
+        "max": 30,
+        "step": 1,
+        "unit": "%",
+        "icon": "mdi:battery-arrow-down",
+    },
+    "bpUpLimitSoc": {
+        "report": "JTS1_BP_STA_REPORT",
+        "platform": "number",
+        "min": 50,
+        "max": 100,
+        "step": 1,
+        "unit": "%",
+        "icon": "mdi:battery-arrow-up-outline",
+    },
+    "bpDownLimitSoc": {
+        "report": "JTS1_BP_STA_REPORT",
+        "platform": "number",
+        "min": 0,
+        "max": 30,
+        "step": 1,
+        "unit": "%",
+        "icon": "mdi:battery-arrow-down-outline",
+    },
+    "energyEfficientEnable": {
+        "report": "JTS1_EMS_PARAM_CHANGE_REPORT",
+        "platform": "switch",
+        "icon": "mdi:leaf",
+    },
+    "emsWordMode": {
+        "report": "JTS1_EMS_CHANGE_REPORT",
+        "platform": "select",
+        "options": ["WORKMODE_SELFUSE", "WORKMODE_TOU", "WORKMODE_BACKUP"],
+        "icon": "mdi:home-battery",
+    },
+}
+
+
+class CommandQueue:
+    """Coalesce parameter changes into one request per inverter and apply them optimistically.
+
+    Changes within COMMAND_DELAY seconds (e.g. dragging a slider) are merged, only the last
+    value of each parameter is sent. Until the next fetched report shows the new value, the
+    entities show the requested value; after COMMAND_CONFIRM_TIMEOUT they fall back to the
+    reported value. Parameters are keyed by (inverter serial, parameter), so the master and
+    the slave inverter are set separately.
+    """
+
+    def __init__(self, hass, ecoflow):
+        self.hass = hass
+        self.ecoflow = ecoflow
+        self._pending = {}  # (inverter_sn, parameter) -> value, not sent yet
+        self._optimistic = {}  # (inverter_sn, parameter) -> (value, expiry), sent but not yet confirmed
+        self._timer = None
+        ecoflow.watch_parameters({key: parameter["report"] for key, parameter in WRITABLE_PARAMETERS.items()})
+
+    def value(self, key, inverter_sn):
+        """Return the optimistic value of a parameter, else the reported one."""
+        if (inverter_sn, key) in self._optimistic:
+            return self._optimistic[(inverter_sn, key)][0]
+        return self.ecoflow.get_parameter(key, inverter_sn)
+
+    @callback
+    def async_set(self, key, value, inverter_sn):
+        """Queue a parameter change, sent after COMMAND_DELAY without further changes."""
+        self._pending[(inverter_sn, key)] = value
+        self._optimistic[(inverter_sn, key)] = (value, time.monotonic() + COMMAND_DELAY + COMMAND_CONFIRM_TIMEOUT)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self.hass.loop.call_later(
+            COMMAND_DELAY, lambda: self.hass.async_create_task(self.async_flush())
+        )
+
+    async def async_flush(self):
+        """Send the queued parameter changes, in one request per inverter."""
+        self._timer = None
+        pending, self._pending = self._pending, {}
+        requests = {}
+        for (inverter_sn, key), value in pending.items():
+            requests.setdefault(inverter_sn, {})[key] = value
+
+        for inverter_sn, params in requests.items():
+            try:
+                await self.hass.async_add_executor_job(self.ecoflow.set_parameters, params, inverter_sn)
+            except IntegrationError as error:
+                _LOGGER.error(
+                    f"{inverter_sn}: Failed to set {params}: {error}" + ISSUE_URL_ERROR_MESSAGE
+                )
+                for key in params:
+                    self._optimistic.pop((inverter_sn, key), None)
+
+    @callback
+    def async_confirm(self):
+        """Drop optimistic values confirmed by (or expired against) the fetched reports."""
+        now = time.monotonic()
+        for (inverter_sn, key), (value, expiry) in list(self._optimistic.items()):
+            if (inverter_sn, key) in self._pending:
+                continue
+            if self.ecoflow.get_parameter(key, inverter_sn) == value:
+                del self._optimistic[(inverter_sn, key)]
+            elif now > expiry:
+                _LOGGER.warning(f"{inverter_sn}: {key} was not confirmed as {value} by the device")
+                del self._optimistic[(inverter_sn, key)]
+
+    @callback
+    def async_cancel(self):
+        """Cancel a scheduled flush, on unload; changes not sent yet are dropped (and logged)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            dropped = {f"{inverter_sn}.{key}": value for (inverter_sn, key), value in self._pending.items()}
+            _LOGGER.warning(f"{self.ecoflow.sn}: Unloaded before sending the changes {dropped}, they were dropped")
+            self._pending = {}
@@ -2,17 +2,19 @@
 from __future__ import annotations
 
 import re
+import time
 from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.exceptions import IntegrationError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import _LOGGER, DOMAIN, ISSUE_URL_ERROR_MESSAGE
-from .ecoflow import Ecoflow, AuthenticationFailed
+from .const import _LOGGER, DOMAIN, ISSUE_URL_ERROR_MESSAGE, PROBE_MAX_AGE
+from .ecoflow import Ecoflow, AuthenticationFailed, RateLimited, get_account_budget
 
 
 # This is the first step's schema when setting up the integration, or its devices
@@ -30,23 +32,29 @@ async def validate_input_for_device(hass: HomeAssistant, data: dict[str, Any]) -
     """Validate the user input allows us to connect."""
 
     ecoflow = Ecoflow(data["serialnumber"], data["username"], data["password"])
+    ecoflow.budget = get_account_budget(hass, data["username"])
 
     try:
-        # Check for authentication
-        # auth_check = await hass.async_add_executor_job(ecoflow.fetch_data)  # TODO what else is needed from fetch_data?
-        auth_check = await hass.async_add_executor_job(ecoflow.authorize)
-        if not auth_check:
-            # If authentication check returns False, raise an authentication failure exception
-            raise AuthenticationFailed("Invalid authentication!")
-
-        # Get device info
-        device = await hass.async_add_executor_job(ecoflow.get_device)
+        # Login and fetch the device detail once: confirms the serial number and reads
+        # the firmware version and inverter topology
+        device = await ecoflow.async_probe(async_get_clientsession(hass))
+
+        # Hand the authenticated instance and its payload over to async_setup_entry; the
+        # flow drops it when it ends without setup, probes of flows left open expire
+        probes = hass.data.setdefault(DOMAIN, {}).setdefault("probes", {})
+        for serial, probe in list(probes.items()):
+            if probe.probe_time is None or time.monotonic() - probe.probe_time >= PROBE_MAX_AGE:
+                del probes[serial]
+        probes[data["serialnumber"]] = ecoflow
 
         # Return the device object with the device information
         return device
 
     # Exception if device cannot be found
     except IntegrationError as e:
+        if isinstance(e.__cause__, RateLimited):
+            _LOGGER.warning(f"Ecoflow API requests of this account are throttled: {e}")
+            raise TooManyRequests from e
         _LOGGER.error(f"Failed to connect to PowerOcean device: {e}" + ISSUE_URL_ERROR_MESSAGE)
         raise CannotConnect from e
 
@@ -64,6 +72,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     # Make sure user input data is passed from one step to the next using user_input_from_step_user
     def __init__(self):
         self.user_input_from_step_user = None
+        self.probe = None  # authenticated instance handed over to the setup, see validate_input_for_device
+
+    @callback
+    def async_remove(self):
+        """Drop the probe of this flow when it ends, unless the setup took it over."""
+        probes = self.hass.data.get(DOMAIN, {}).get("probes", {})
+        if self.probe is not None and probes.get(self.probe.sn) is self.probe:
+            del probes[self.probe.sn]
 
     # This is step 1 for the host/port/user/pass function.
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
@@ -75,8 +91,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 # validate_input_for_devices will try to detect the device and get more info from it,
                 # and authenticate and  deal with exceptions
                 device = await validate_input_for_device(self.hass, user_input)
+                self.async_remove()  # a repeated step replaces the probe
+                self.probe = self.hass.data[DOMAIN]["probes"][user_input["serialnumber"]]
             except CannotConnect:
                 errors["base"] = "cannot_connect"
+            except TooManyRequests:
+                errors["base"] = "rate_limited"
             except InvalidAuth:
                 errors["base"] = "invalid_auth"
                 return self.async_show_form(step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors)
@@ -147,6 +167,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 ),
                 vol.Required("group_sensors", default=True): bool,
                 vol.Required("disable_sensors", default=False): bool,
+                vol.Required("streaming", default=False): bool,
+                vol.Required("diagnostic_attributes", default=True): bool,
+                vol.Required("performance_sensors", default=False): bool,
+                vol.Required("metrics_exporter", default=False): bool,
+                vol.Required("low_bandwidth", default=False): bool,
+                vol.Required("backfill_statistics", default=True): bool,
             }
         )
 
@@ -166,6 +192,10 @@ class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
 
 
+class TooManyRequests(HomeAssistantError):
+    """Error to indicate the requests of the account are throttled."""
+
+
 # Helper function to sanitize
 def sanitize_device_name(device_name: str, fall_back: str, max_length=255) -> str:
     # Trim whitespace
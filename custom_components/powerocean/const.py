@@ -3,14 +3,24 @@
 import logging
 from homeassistant.const import Platform
 
+from .powerocean_core.const import ISSUE_URL, ISSUE_URL_ERROR_MESSAGE  # noqa: F401
+
 DOMAIN = "powerocean"
 NAME = "Ecoflow PowerOcean"
 VERSION = "2024.08.27"
-ISSUE_URL = "https://github.com/niltrip/powerocean/issues"
-ISSUE_URL_ERROR_MESSAGE = " Please log any issues here: " + ISSUE_URL
 
 
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [
+    Platform.SENSOR,
+    Platform.BINARY_SENSOR,
+]
+
+# Settable parameters, only set up when an endpoint for the changes is known (see Ecoflow.url_user_set)
+PARAMETER_PLATFORMS: list[Platform] = [
+    Platform.NUMBER,
+    Platform.SELECT,
+    Platform.SWITCH,
+]
 
 _LOGGER = logging.getLogger("custom_components.powerocean")
 
@@ -24,6 +34,35 @@ ATTR_PRODUCT_NAME = "Device Name"
 ATTR_PRODUCT_VERSION = "Vendor Firmware Version"
 ATTR_PRODUCT_BUILD = "Vendor Product Build"
 ATTR_PRODUCT_FEATURES = "Vendor Product Features"
+ATTR_STALE_SINCE = "Stale Since"
+ATTR_DATA_AGE = "Data Age"
+ATTR_FAILURES = "Consecutive Failures"
+ATTR_RETRY_IN = "Retry In"
+
+# Control commands (see commands.py): changes within COMMAND_DELAY seconds are sent as one request,
+# the requested value is shown until confirmed by a fetched report or COMMAND_CONFIRM_TIMEOUT has passed
+COMMAND_DELAY = 1.0
+COMMAND_CONFIRM_TIMEOUT = 60
+
+# Event fired when the active faults of a module of an inverter change
+EVENT_FAULT = DOMAIN + "_fault"
+
+# Dispatcher signal sent after each poll of a config entry, formatted with the entry_id
+SIGNAL_UPDATE = DOMAIN + "_update_{}"
+
+# Seconds without data after which a throttled or over-budget entry marks its sensors stale
+RATE_LIMIT_STALE_AFTER = 120
+
+# Persistence of the integrated energy totals (see accumulator.py)
+ENERGY_STORE_VERSION = 1
+ENERGY_SAVE_DELAY = 60  # seconds between writes of the energy totals
+
+# Full poll interval (seconds) used for reconciliation when MQTT streaming is enabled
+STREAM_RECONCILE_INTERVAL = 300
+
+# Low bandwidth profile (metered connections): minimum poll interval, and reconciliation interval with streaming
+LOW_BANDWIDTH_POLLING = 60
+LOW_BANDWIDTH_RECONCILE = 1800
 
 
 STARTUP_MESSAGE = f"""
@@ -35,3 +74,20 @@ If you have any issues with this custom component please open an issue here:
 {ISSUE_URL}
 ----------------------------------------------------------------------------
 """
+
+# Age (seconds) up to which the login and payload of the config flow are reused by the setup
+PROBE_MAX_AGE = 300
+
+# Persistence of the discovered endpoints (see catalog.py)
+CATALOG_STORE_VERSION = 1
+CATALOG_SAVE_DELAY = 30  # seconds a changed catalog waits for further changes before it is written
+
+# Maximum number of sensor states written in one pass of the event loop, the rest follow in the next passes
+STATE_WRITE_BATCH = 250
+
+# HTTP endpoint of the metrics exporter (see exporter.py), for all entries with the exporter enabled
+EXPORTER_URL = "/api/powerocean/metrics"
+
+# Statistics of the energy counters across a gap (see backfill.py) are imported this many seconds
+# after the start of the hour in which the gap ended, when the recorder has compiled the gap's hours
+BACKFILL_DELAY = 600
@@ -0,0 +1,47 @@
+"""diagnostics.py: Diagnostics download for the PowerOcean integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+# Credentials are never part of a diagnostics download
+TO_REDACT = {"username", "password", "token", "user_id", "userId", "email"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    ecoflow = hass.data[DOMAIN].get(entry.entry_id)
+    diagnostics = {"entry": async_redact_data(entry.as_dict(), TO_REDACT)}
+    if ecoflow is None:
+        return diagnostics
+
+    diagnostics.update(
+        {
+            "device": ecoflow.device,
+            "breaker": {
+                "state": ecoflow.breaker.state,
+                "failures": ecoflow.breaker.failures,
+                "retry_in": ecoflow.breaker.retry_in(),
+            },
+            "budget": ecoflow.budget.as_dict() if ecoflow.budget is not None else None,
+            "last_success": ecoflow.last_success,
+            "sensors": len(hass.data[DOMAIN]["device_specific_sensors"].get(entry.entry_id, [])),
+            "stale_sensors": len(ecoflow.stale_endpoints),
+            "report_ages": {
+                f"{inverter_sn}_{report}": round(ecoflow.report_age(inverter_sn, report), 1)
+                for inverter_sn, report in sorted(ecoflow._report_times)
+            },
+            "faults": {
+                serial: {module: sorted(codes, key=str) for module, codes in faults.items() if codes}
+                for serial, faults in ecoflow.faults.items()
+            },
+            "metrics": ecoflow.metrics.summary(),
+        }
+    )
+    return diagnostics
@@ -0,0 +1,92 @@
+"""entity.py: Base entity for the settable PowerOcean parameters (number, select, switch)."""
+
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity, EntityCategory
+
+from .commands import WRITABLE_PARAMETERS
+from .const import DOMAIN, SIGNAL_UPDATE
+from .ecoflow import Ecoflow
+
+
+async def async_setup_parameter_entities(hass, config_entry, async_add_entities, platform, entity_class):
+    """Add an entity for each parameter of the platform and inverter, once the inverter reports it.
+
+    The platforms are only set up when an endpoint for the changes is known (see Ecoflow.url_user_set).
+    """
+    ecoflow = hass.data[DOMAIN][config_entry.entry_id]
+    added = set()  # (inverter_sn, parameter)
+
+    @callback
+    def async_add_parameter_entities():
+        new_keys = [
+            (inverter_sn, key)
+            for inverter_sn, values in ecoflow.parameters.items()
+            for key in values
+            if WRITABLE_PARAMETERS[key]["platform"] == platform and (inverter_sn, key) not in added
+        ]
+        if new_keys:
+            added.update(new_keys)
+            async_add_entities(
+                [entity_class(ecoflow, config_entry.entry_id, key, inverter_sn) for inverter_sn, key in new_keys]
+            )
+
+    async_add_parameter_entities()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_UPDATE.format(config_entry.entry_id), async_add_parameter_entities)
+    )
+
+
+class PowerOceanParameterEntity(Entity):
+    """A settable parameter, changed through the command queue of the Ecoflow instance."""
+
+    _attr_entity_category = EntityCategory.CONFIG
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, ecoflow: Ecoflow, entry_id, key, inverter_sn):
+        """Initialize the entity."""
+        self.ecoflow = ecoflow
+        self._entry_id = entry_id
+        self._key = key
+        self._inverter_sn = inverter_sn
+        self._parameter = WRITABLE_PARAMETERS[key]
+        self._attr_unique_id = f"{inverter_sn}_{key}_setting"
+        self._attr_name = key if inverter_sn == getattr(ecoflow, "master_sn", inverter_sn) else f"{key}_slave"
+        self._attr_icon = self._parameter.get("icon")
+        self._written = None  # last written value, to skip identical writes
+
+    @property
+    def _value(self):
+        return self.ecoflow.commands.value(self._key, self._inverter_sn)
+
+    @property
+    def available(self):
+        """Return True while the parameter is reported."""
+        return self._value is not None
+
+    @property
+    def device_info(self):
+        """Return device specific attributes."""
+        return {
+            "identifiers": {(DOMAIN, self.ecoflow.device["serial"])},
+            "name": self.ecoflow.device["name"],
+            "manufacturer": "ECOFLOW",
+        }
+
+    def _async_set(self, value):
+        self.ecoflow.commands.async_set(self._key, value, self._inverter_sn)
+        self._async_handle_update()
+
+    async def async_added_to_hass(self):
+        """Call when the entity is added to Home Assistant."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_UPDATE.format(self._entry_id), self._async_handle_update)
+        )
+        self._async_handle_update()
+
+    @callback
+    def _async_handle_update(self):
+        if self._value != self._written:
+            self._written = self._value
+            self.async_write_ha_state()
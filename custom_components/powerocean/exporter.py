@@ -0,0 +1,64 @@
+"""exporter.py: HTTP endpoint exporting the PowerOcean endpoints of all entries (Prometheus text, Influx lines)."""
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import callback
+
+from .const import _LOGGER, DOMAIN, EXPORTER_URL
+from .powerocean_core.exporter import (
+    INFLUX_CONTENT_TYPE,
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsExporter,
+    render_influx,
+    render_prometheus,
+)
+
+
+@callback
+def async_setup_exporter(hass, config_entry, site):
+    """Return the exporter of a config entry, registering the HTTP view on first use."""
+    data = hass.data[DOMAIN]
+    exporters = data.setdefault("exporters", {})
+    if not data.get("exporter_view"):
+        if getattr(hass, "http", None) is None:
+            _LOGGER.warning(f"{site}: The HTTP integration is not loaded, the metrics exporter is not available")
+        else:
+            hass.http.register_view(PowerOceanMetricsView(exporters))
+            data["exporter_view"] = True
+
+    exporter = exporters[config_entry.entry_id] = MetricsExporter(site)
+
+    @callback
+    def async_remove_exporter():
+        exporters.pop(config_entry.entry_id, None)
+
+    config_entry.async_on_unload(async_remove_exporter)
+    return exporter
+
+
+class PowerOceanMetricsView(HomeAssistantView):
+    """GET /api/powerocean/metrics[?format=influx], authenticated like the rest of the API."""
+
+    url = EXPORTER_URL
+    name = "api:powerocean:metrics"
+
+    def __init__(self, exporters):
+        self._exporters = exporters  # entry_id -> MetricsExporter, shared with the setup
+        self._cache = {}  # format -> (versions of the exporters, rendered text)
+
+    async def get(self, request):
+        """Return the last poll of all entries, rendered once per poll."""
+        fmt = request.query.get("format", "prometheus")
+        if fmt not in ("prometheus", "influx"):
+            return web.Response(status=400, text=f"Unknown format {fmt}")
+
+        exporters = list(self._exporters.values())
+        versions = tuple((id(exporter), exporter.version) for exporter in exporters)
+        cached = self._cache.get(fmt)
+        if cached is None or cached[0] != versions:
+            render = render_influx if fmt == "influx" else render_prometheus
+            cached = self._cache[fmt] = (versions, render(exporters))
+
+        content_type = INFLUX_CONTENT_TYPE if fmt == "influx" else PROMETHEUS_CONTENT_TYPE
+        return web.Response(body=cached[1].encode(), headers={"Content-Type": content_type})
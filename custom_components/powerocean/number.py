@@ -0,0 +1,32 @@
+"""number.py: Number entities for the settable PowerOcean parameters."""
+
+from homeassistant.components.number import NumberEntity, NumberMode
+
+from .entity import PowerOceanParameterEntity, async_setup_parameter_entities
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    await async_setup_parameter_entities(hass, config_entry, async_add_entities, "number", PowerOceanNumber)
+
+
+class PowerOceanNumber(PowerOceanParameterEntity, NumberEntity):
+    """Representation of a PowerOcean numeric setting, e.g. LED brightness or SoC limits."""
+
+    _attr_mode = NumberMode.SLIDER
+
+    def __init__(self, ecoflow, entry_id, key, inverter_sn):
+        """Initialize the number."""
+        super().__init__(ecoflow, entry_id, key, inverter_sn)
+        self._attr_native_min_value = self._parameter["min"]
+        self._attr_native_max_value = self._parameter["max"]
+        self._attr_native_step = self._parameter["step"]
+        self._attr_native_unit_of_measurement = self._parameter.get("unit")
+
+    @property
+    def native_value(self):
+        """Return the current (or requested) value."""
+        return self._value
+
+    async def async_set_native_value(self, value):
+        """Queue the new value, coalesced with further changes."""
+        self._async_set(int(value))
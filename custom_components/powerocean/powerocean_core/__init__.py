@@ -0,0 +1,39 @@
+"""PowerOcean core library: Ecoflow cloud client and report parser, without Home Assistant.
+
+Nothing is imported here: the exported names load their module on first access (PEP 562),
+so importing a submodule such as const does not pull in the client and the parser, and
+requests and aiohttp are imported on first use. The Home Assistant integration wraps it in
+ecoflow.py, headless tools use it directly.
+"""
+
+import importlib
+
+# Exported name -> module
+_EXPORTS = {
+    "AuthenticationFailed": ".ecoflow",
+    "BudgetExhausted": ".ecoflow",
+    "Ecoflow": ".ecoflow",
+    "EcoflowError": ".ecoflow",
+    "PowerOceanEndPoint": ".ecoflow",
+    "RateLimited": ".ecoflow",
+    "RequestBudget": ".budget",
+}
+
+__all__ = [
+    "AuthenticationFailed",
+    "BudgetExhausted",
+    "Ecoflow",
+    "EcoflowError",
+    "PowerOceanEndPoint",
+    "RateLimited",
+    "RequestBudget",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
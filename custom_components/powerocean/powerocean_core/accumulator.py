@@ -0,0 +1,89 @@
+"""accumulator.py: Riemann energy accumulators for PowerOcean power endpoints."""
+
+import re
+import time
+
+from .ecoflow import PowerOceanEndPoint
+
+
+# Power endpoints integrated into energy counters, matched on the friendly name.
+# Each entry gives the suffix for the positive and (optionally) the negative direction,
+# e.g. bpPwr > 0 is charging the battery, bpPwr < 0 is discharging.
+ENERGY_SOURCES = [
+    (re.compile(r"^mpptPv\d+_pwr"), "energy", None),
+    (re.compile(r"^bpPwr"), "chargeEnergy", "dischargeEnergy"),
+    (re.compile(r"^pcs[ABC]Phase_actPwr"), "outputEnergy", "inputEnergy"),
+]
+
+# Do not integrate across gaps longer than this (seconds), e.g. after a cloud outage
+MAX_GAP = 300
+
+
+class EnergyAccumulator:
+    """Integrate selected power endpoints (W) into energy totals (kWh), once per poll."""
+
+    def __init__(self, totals=None):
+        self.totals = dict(totals or {})  # energy unique_id -> kWh
+        self._last = {}  # power unique_id -> (timestamp, W)
+        self._sources = {}  # power unique_id -> (positive suffix, negative suffix) or None
+
+    def as_dict(self):
+        """Return the totals for persistence."""
+        return dict(self.totals)
+
+    def _match(self, endpoint):
+        uid = endpoint.internal_unique_id
+        if uid not in self._sources:
+            self._sources[uid] = None
+            for pattern, positive, negative in ENERGY_SOURCES:
+                if pattern.match(endpoint.friendly_name):
+                    self._sources[uid] = (positive, negative)
+                    break
+        return self._sources[uid]
+
+    def integrate(self, sensors, now=None):
+        """Integrate the power endpoints in sensors and return the energy endpoints."""
+        if now is None:
+            now = time.monotonic()
+
+        data = {}
+        for endpoint in sensors.values():
+            directions = self._match(endpoint)
+            if directions is None:
+                continue
+
+            try:
+                power = float(endpoint.value)
+            except (TypeError, ValueError):
+                continue
+
+            # trapezoidal rule between the previous and the current sample
+            uid = endpoint.internal_unique_id
+            previous = self._last.get(uid)
+            self._last[uid] = (now, power)
+            delta = {}
+            if previous is not None and 0 < now - previous[0] <= MAX_GAP:
+                hours = (now - previous[0]) / 3600
+                p0, p1 = previous[1], power
+                delta[0] = (max(p0, 0.0) + max(p1, 0.0)) / 2 * hours / 1000
+                delta[1] = (max(-p0, 0.0) + max(-p1, 0.0)) / 2 * hours / 1000
+
+            for i, suffix in enumerate(directions):
+                if suffix is None:
+                    continue
+                unique_id = f"{uid}_{suffix}"
+                total = self.totals.get(unique_id, 0.0) + delta.get(i, 0.0)
+                self.totals[unique_id] = total
+
+                data[unique_id] = PowerOceanEndPoint(
+                    internal_unique_id=unique_id,
+                    serial=endpoint.serial,
+                    name=f"{endpoint.name}_{suffix}",
+                    friendly_name=f"{endpoint.friendly_name}_{suffix}",
+                    value=round(total, 4),
+                    unit="kWh",
+                    description=f"{endpoint.description} ({suffix})",
+                    icon=None,
+                )
+
+        return data
@@ -0,0 +1,61 @@
+"""breaker.py: circuit breaker for the Ecoflow cloud API."""
+
+import time
+
+
+class CircuitBreaker:
+    """Stop calling the cloud after repeated failures and retry with exponential backoff.
+
+    closed:    requests pass, failures are counted
+    open:      requests are skipped until the backoff delay has passed
+    half_open: one trial request passes, success closes and failure reopens the breaker
+    """
+
+    def __init__(self, threshold=3, base_delay=10, max_delay=600):
+        self.threshold = threshold  # consecutive failures before the breaker opens
+        self.base_delay = base_delay  # seconds, doubled on every failed trial
+        self.max_delay = max_delay
+        self.failures = 0
+        self.opened_at = None
+        self.retry_at = None
+
+    @property
+    def state(self):
+        """Return closed, open or half_open."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() < self.retry_at:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        """Return True if a request may be sent now."""
+        return self.state != "open"
+
+    def retry_in(self):
+        """Return the seconds until the next trial request, 0 if not open."""
+        if self.opened_at is None:
+            return 0
+        return max(0, round(self.retry_at - time.monotonic()))
+
+    def record_success(self):
+        """Close the breaker, return True if it was open before."""
+        was_open = self.opened_at is not None
+        self.failures = 0
+        self.opened_at = None
+        self.retry_at = None
+        return was_open
+
+    def record_failure(self):
+        """Count a failure, return True if the breaker has just opened."""
+        self.failures += 1
+        if self.failures < self.threshold:
+            return False
+
+        now = time.monotonic()
+        delay = min(self.base_delay * 2 ** (self.failures - self.threshold), self.max_delay)
+        self.retry_at = now + delay
+        if self.opened_at is None:
+            self.opened_at = now
+            return True
+        return False
@@ -0,0 +1,137 @@
+"""budget.py: request budget of an Ecoflow account, shared by all systems polled with it."""
+
+import threading
+import time
+
+
+# Requests per second and burst of one account; Ecoflow throttles (and may block) accounts above its limits
+BUDGET_RATE = 0.5
+BUDGET_BURST = 10
+
+# Backoff after a throttling response (seconds), doubled for each further one until a request succeeds
+BACKOFF_BASE = 60
+BACKOFF_MAX = 1800
+
+
+class RequestBudget:
+    """Token bucket of an account, split fairly between the registered sites.
+
+    Each site refills its own share (rate / number of sites) and may borrow from the
+    account while more than half of the burst is unused, so an idle site leaves its
+    budget to the others. Requests without a site (login of the config flow) and
+    priority requests (parameter changes) only need a token of the account. After a
+    throttling response no request passes until the backoff delay has passed.
+    """
+
+    def __init__(self, rate=BUDGET_RATE, burst=BUDGET_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._sites = {}  # site -> tokens of its share
+        self._intervals = {}  # site -> seconds between its polls
+        self._lock = threading.Lock()
+        self.throttled = 0  # consecutive throttling responses
+        self.backoff_until = None
+        self.granted = 0
+        self.denied = 0
+
+    def register(self, site):
+        """Add a site to the split."""
+        with self._lock:
+            self._sites.setdefault(site, 1.0)
+
+    def unregister(self, site):
+        """Remove a site from the split."""
+        with self._lock:
+            self._sites.pop(site, None)
+            self._intervals.pop(site, None)
+
+    def set_interval(self, site, seconds):
+        """Set the poll interval of a registered site; return the requests per second of all sites."""
+        with self._lock:
+            if site in self._sites and seconds > 0:
+                self._intervals[site] = seconds
+            return self.demand
+
+    @property
+    def sites(self):
+        return len(self._sites)
+
+    @property
+    def demand(self):
+        """Requests per second the polls of the sites need, above the rate some of them are skipped."""
+        return sum(1 / seconds for seconds in self._intervals.values())
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        if self._sites:
+            share_rate = self.rate / len(self._sites)
+            share_burst = max(1.0, self.burst / len(self._sites))
+            for site, tokens in self._sites.items():
+                self._sites[site] = min(share_burst, tokens + elapsed * share_rate)
+
+    def acquire(self, site=None, priority=False):
+        """Take a token for a request of site, return False if the request has to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if self.backoff_until is not None and now < self.backoff_until:
+                self.denied += 1
+                return False
+            self._refill(now)
+            if self._tokens < 1:
+                self.denied += 1
+                return False
+
+            share = self._sites.get(site)
+            if share is not None and not priority:
+                if share >= 1:
+                    self._sites[site] = share - 1
+                elif self._tokens < self.burst / 2 + 1:
+                    self.denied += 1
+                    return False
+            self._tokens -= 1
+            self.granted += 1
+            return True
+
+    def retry_in(self):
+        """Return the seconds of backoff left, 0 if not throttled."""
+        if self.backoff_until is None:
+            return 0
+        return max(0, round(self.backoff_until - time.monotonic()))
+
+    def record_throttled(self, retry_after=None):
+        """Start (or extend) the backoff after a throttling response; return the delay."""
+        with self._lock:
+            self.throttled += 1
+            delay = min(BACKOFF_BASE * 2 ** (self.throttled - 1), BACKOFF_MAX)
+            if retry_after:
+                delay = max(delay, retry_after)
+            self.backoff_until = time.monotonic() + delay
+            self._tokens = 0.0
+            return delay
+
+    def record_success(self):
+        """Reset the backoff after a successful request."""
+        if self.throttled:
+            with self._lock:
+                self.throttled = 0
+                self.backoff_until = None
+
+    def as_dict(self):
+        """Return the state of the budget, for diagnostics."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "sites": {site: round(tokens, 2) for site, tokens in self._sites.items()},
+                "demand": round(self.demand, 3),
+                "throttled": self.throttled,
+                "retry_in": self.retry_in(),
+                "granted": self.granted,
+                "denied": self.denied,
+            }
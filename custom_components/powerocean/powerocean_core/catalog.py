@@ -0,0 +1,33 @@
+"""catalog.py: persistent catalog of the discovered PowerOcean endpoints, for a cold start without the cloud."""
+
+import hashlib
+import json
+
+from .ecoflow import PowerOceanEndPoint
+
+
+# Endpoint fields kept in the catalog; values and attributes are live data and not stored
+CATALOG_FIELDS = ("internal_unique_id", "serial", "name", "friendly_name", "unit", "description", "icon")
+
+
+def build_catalog(endpoints):
+    """Return the catalog entries (sorted by unique id) of {unique_id: endpoint}."""
+    return [
+        {field: getattr(endpoint, field) for field in CATALOG_FIELDS}
+        for _, endpoint in sorted(endpoints.items())
+    ]
+
+
+def catalog_hash(entries):
+    """Return the schema hash of catalog entries: changes when endpoints, units or names change."""
+    return hashlib.sha1(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+
+
+def endpoints_from_catalog(entries):
+    """Return {unique_id: endpoint} without values, for registering the entities as unavailable."""
+    endpoints = {}
+    for entry in entries:
+        endpoint = PowerOceanEndPoint(value=None, **{field: entry.get(field) for field in CATALOG_FIELDS})
+        endpoints[endpoint.internal_unique_id] = endpoint
+
+    return endpoints
@@ -0,0 +1,129 @@
+"""collector.py: headless collector, polls PowerOcean systems and writes the parsed snapshots.
+
+    python -m custom_components.powerocean.powerocean_core.collector --serial HJ31... --format ndjson --output powerocean.ndjson
+
+from the repository root, or as powerocean_core.collector from the parent of a copied powerocean_core folder
+(not from custom_components/powerocean, where the platform select.py shadows the standard library).
+
+Credentials come from --username/--password or POWEROCEAN_USERNAME/POWEROCEAN_PASSWORD.
+Each poll writes one snapshot per serial ({unique_id: value} of the parsed endpoints).
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from .backfill import HISTORY_PATH
+from .budget import RequestBudget
+from .const import _LOGGER
+from .ecoflow import SET_PATH, BudgetExhausted, Ecoflow
+from .writers import ColumnarWriter, NdjsonWriter, RotatingFile
+
+
+CLOUD_URLS = ("https://api.ecoflow.com", "https://api-e.ecoflow.com")
+
+
+def _set_api_url(ecoflow, api_url):
+    """Point all cloud urls of the instance to api_url (e.g. the stand-in server, which also serves a history
+    and takes parameter changes)."""
+    for name, url in vars(ecoflow).copy().items():
+        if name.startswith("url_") and url is not None:
+            for prefix in CLOUD_URLS:
+                if url.startswith(prefix):
+                    setattr(ecoflow, name, api_url.rstrip("/") + url[len(prefix):])
+                    break
+    ecoflow.url_history = api_url.rstrip("/") + HISTORY_PATH
+    ecoflow.url_user_set = api_url.rstrip("/") + SET_PATH
+
+
+def _make_writer(args):
+    file = RotatingFile(args.output, max_bytes=args.max_bytes, backups=args.backups)
+    if args.format == "columnar":
+        return ColumnarWriter(file, batch=args.batch)
+    return NdjsonWriter(file)
+
+
+def poll(ecoflow, writer):
+    """Fetch and write one snapshot; return False if the poll failed."""
+    try:
+        if ecoflow.token is None:
+            ecoflow.authorize()
+        endpoints = ecoflow.fetch_data()
+    except BudgetExhausted:
+        _LOGGER.debug(f"{ecoflow.sn}: request budget used up, poll skipped")
+        return False
+    except Exception as error:
+        _LOGGER.warning(f"{ecoflow.sn}: poll failed: {error}")
+        ecoflow.token = None  # log in again on the next poll
+        return False
+
+    if endpoints is None:
+        _LOGGER.warning(f"{ecoflow.sn}: no reports in the response")
+        return False
+
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    writer.write(timestamp, ecoflow.sn, endpoints, ecoflow.stale_endpoints)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll PowerOcean systems and write the parsed snapshots.")
+    parser.add_argument("--serial", action="append", required=True, help="serial number (repeatable)")
+    parser.add_argument("--username", default=os.environ.get("POWEROCEAN_USERNAME"))
+    parser.add_argument("--password", default=os.environ.get("POWEROCEAN_PASSWORD"))
+    parser.add_argument("--interval", type=float, default=10, help="seconds between polls")
+    parser.add_argument("--count", type=int, default=0, help="number of polls (0: until interrupted)")
+    parser.add_argument("--format", choices=("ndjson", "columnar"), default="ndjson")
+    parser.add_argument("--output", default="-", help="output file, - for stdout")
+    parser.add_argument("--max-bytes", type=int, default=0, help="rotate the output file at this size")
+    parser.add_argument("--backups", type=int, default=3, help="rotated files kept")
+    parser.add_argument("--batch", type=int, default=60, help="snapshots per columnar block")
+    parser.add_argument("--api-url", help="base url replacing the Ecoflow cloud (e.g. the stand-in server)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    if args.username is None or args.password is None:
+        parser.error("credentials missing: --username/--password or POWEROCEAN_USERNAME/POWEROCEAN_PASSWORD")
+    if args.format == "columnar" and args.output == "-" and sys.stdout.isatty():
+        parser.error("columnar output is binary, use --output")
+
+    # All serials are polled with one account and share its request budget
+    budget = RequestBudget()
+    systems = []
+    for serial in args.serial:
+        ecoflow = Ecoflow(serial, args.username, args.password)
+        ecoflow.budget = budget
+        budget.register(serial)
+        if args.api_url:
+            _set_api_url(ecoflow, args.api_url)
+        systems.append(ecoflow)
+
+    writer = _make_writer(args)
+    polls = 0
+    try:
+        while True:
+            started = time.monotonic()
+            for ecoflow in systems:
+                poll(ecoflow, writer)
+            if args.format == "ndjson":
+                writer.flush()
+            polls += 1
+            if args.count and polls >= args.count:
+                break
+            time.sleep(max(0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
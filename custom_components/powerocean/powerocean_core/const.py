@@ -0,0 +1,9 @@
+"""Constants of the PowerOcean core library."""
+
+import logging
+
+ISSUE_URL = "https://github.com/niltrip/powerocean/issues"
+ISSUE_URL_ERROR_MESSAGE = " Please log any issues here: " + ISSUE_URL
+
+# Child of the integration's logger when run inside Home Assistant
+_LOGGER = logging.getLogger(__package__)
@@ -0,0 +1,1309 @@
+"""ecoflow.py: API for PowerOcean integration   AJB14."""
+""" closely based on code by niltrip modified to cater for dual master/slave inverter configuration  """
+""" AndyBowden Dec 2024 """
+
+import base64
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from json import loads as json_loads
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .breaker import CircuitBreaker
+from .const import _LOGGER
+from .ecology import REPORT_HANDLERS
+from .faults import EMS_CODE_KEYS, decode_faults, diff_faults
+from .metrics import Metrics
+from .powerflow import flows_from_stream
+
+
+def _requests():
+    """Import requests on first use, keeping the import of the core library fast."""
+    import requests
+
+    return requests
+
+
+# Better storage of PowerOcean endpoint
+PowerOceanEndPoint = namedtuple(
+    "PowerOceanEndPoint",
+    "internal_unique_id, serial, name, friendly_name, value, unit, description, icon, attributes",
+    defaults=(None,),
+)
+
+# Periodic reports and the age (seconds) after which their sensors are considered stale.
+# Reports sent only on change (e.g. JTS1_EMS_CHANGE_REPORT) never become stale.
+STALE_REPORT_AGE = {
+    "JTS1_EMS_HEARTBEAT": 600,
+    "JTS1_BP_STA_REPORT": 600,
+    "JTS1_ENERGY_STREAM_REPORT": 600,
+}
+
+# Extraction stages of the inverter reports (see _get_sensors), by method name; the reports of
+# attached devices are dispatched by ecology.REPORT_HANDLERS
+REPORT_STAGES = {
+    "JTS1_EMS_CHANGE_REPORT": "_get_sensors_ems_change",
+    "JTS1_BP_STA_REPORT": "_get_sensors_battery",
+    "JTS1_EMS_HEARTBEAT": "_get_sensors_ems_heartbeat",
+    "JTS1_ENERGY_STREAM_REPORT": "_get_sensors_powerflow",
+}
+
+# Per-pack arrays in JTS1_BP_STA_REPORT: key, unit and attribute name of the array
+CELL_ARRAYS = [
+    ("bpCellVol", "mV", "cell_voltages"),
+    ("bpTemp", "°C", "temperatures"),
+]
+
+
+# Path of the parameter changes on the stand-in server (see standin.py). Ecoflow documents no
+# set endpoint for PowerOcean on this API, so against the cloud the settings stay read-only.
+SET_PATH = "/provider-service/user/device/quota"
+
+# Words of a (non-success) response message which indicate throttling, e.g. "Request too frequent"
+THROTTLE_MESSAGES = ("frequent", "too many", "rate limit")
+
+# Keys which are converted to their native type once at parse time (see _normalize_value)
+DATETIME_KEYS = ("createTime", "updateTime")
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+FLAG_KEYS = ("online",)
+
+
+# ecoflow_api to detect device and get device info, fetch the actual data from the PowerOcean device, and parse it
+# Rename, there is an official API since june
+class Ecoflow:
+    """Class representing Ecoflow"""
+
+    def __init__(self, serialnumber, username, password):
+        self.sn = serialnumber
+        self.unique_id = serialnumber
+        self.ecoflow_username = username
+        self.ecoflow_password = password
+        self.token = None
+        self.device = None
+        self.url_iot_app = "https://api.ecoflow.com/auth/login"
+        self.url_user_fetch = f"https://api-e.ecoflow.com/provider-service/user/device/detail?sn={self.sn}"
+        self.url_mqtt_certification = "https://api.ecoflow.com/iot-auth/app/certification"
+        self.url_user_set = None  # parameter changes (see commands.py), none known for the cloud
+        self.url_history = None  # counter history (see backfill.py), none known for the cloud
+        self._response = None  # last full payload, updated incrementally by the MQTT stream
+        self._sensors = None  # last full sensor set, updated per report by apply_report
+        self.parameter_reports = {}  # settable parameter -> report, see watch_parameters
+        self.parameters = {}  # inverter_sn -> {parameter: value}, replaced (not changed) on each parse
+        self.probe_time = None  # set when the payload was fetched by async_probe (config flow)
+        self._report_cache = {}  # (inverter_sn, report) -> (fingerprint, extracted sensors)
+        self.changed_reports = set()  # (inverter_sn, report) extracted again in the last poll
+        self._report_times = {}  # (inverter_sn, report) -> (updateTime, epoch seconds)
+        self._pack_times = {}  # (inverter_sn, report key of a pack) -> (bpTimestamp, unique ids)
+        self._timezone = None  # site timezone, from response['data']['timezone']
+        self._timezone_invalid = None  # last timezone name which failed to load
+        self.stale_endpoints = set()  # unique ids extracted from stale reports in the last poll
+        self.faults = {}  # inverter_sn -> {module: frozenset of active fault codes}
+        self.fault_changes = []  # (inverter_sn, module, added, removed) not yet taken by pop_fault_changes
+        self._pack_index = {}  # inverter_sn -> {bpSn: pack number}
+        self._pack_serials = {}  # (inverter_sn, report key of a pack) -> bpSn
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker()  # guards fetch_data during cloud outages
+        self.metrics = Metrics()  # rolling latency/size/count histograms, see diagnostics.py
+        self.last_success = None  # time of the last successful fetch
+        self.stale_since = None  # set while the last good values are kept during an outage
+        self.budget = None  # RequestBudget of the account (see budget.py), shared with other instances
+        self._http = None  # requests session, keeps the (TLS) connection open between polls
+        self._etag = None  # validator of the last detail response, for conditional requests
+        self.data_usage = 0  # bytes sent and received over HTTP and MQTT since start (estimated, without TLS/TCP)
+        self._usage_lock = threading.Lock()  # data_usage is added to from the polls and the MQTT thread
+        # self.authorize()  # authorize user and get device details
+
+    def get_device(self, response=None):
+        """Function get device, with firmware and inverter topology taken from a detail response"""
+        self.device = {
+            "product": "PowerOcean",
+            "vendor": "Ecoflow",
+            "serial": self.sn,
+            "version": "5.1.15",  # fallback if the response carries no firmware version
+            "build": "6",
+            "name": "PowerOcean",
+            "features": "Photovoltaik",
+        }
+        if response is not None:
+            self.device.update(self._get_device_details(response["data"]))
+
+        return self.device
+
+    # The detail response carries no EMS firmware version; the application and loader firmware
+    # of the battery modules (moduleAplSwVer, moduleLoaderSwVer) are the versions available.
+    def _get_device_details(self, data):
+        """Function return version, build and topology (inverters, packs) of a detail response."""
+        parallel = data.get("parallel") or {}
+        inverters = list(parallel) or [self.sn]
+        details = {
+            "inverters": inverters,
+            "master_serial": inverters[-1],
+            "packs": {},
+        }
+        if len(inverters) > 1:
+            details["slave_serial"] = inverters[0]
+
+        for inverter_sn in inverters:
+            d = (parallel.get(inverter_sn) or data.get("quota") or {}).get("JTS1_BP_STA_REPORT") or {}
+            packs = [
+                json_loads(blob) for key, blob in d.items()
+                if key and isinstance(blob, str) and '"bpSn"' in blob
+            ]
+            details["packs"][inverter_sn] = len(packs)
+            if inverter_sn == details["master_serial"] and packs:
+                for field, key in (("version", "moduleAplSwVer"), ("build", "moduleLoaderSwVer")):
+                    if packs[0].get(key):
+                        details[field] = self._decode_version(packs[0][key])
+
+        return details
+
+    def _decode_version(self, value):
+        """Function decode a firmware version packed into 4 bytes, e.g. 67176454 => 4.1.1.6"""
+        value = int(value)
+        return ".".join(str(value >> shift & 0xFF) for shift in (24, 16, 8, 0))
+
+    def _session(self):
+        """Function return the HTTP session (gzip/deflate negotiated by requests, connection kept alive)."""
+        if self._http is None:
+            self._http = _requests().Session()
+        return self._http
+
+    def close(self):
+        """Function close the HTTP session and its connections, e.g. on unload; a later request opens a new one."""
+        http, self._http = self._http, None
+        if http is not None:
+            http.close()
+
+    def add_data_usage(self, nbytes):
+        """Function add bytes sent or received outside the HTTP session (e.g. MQTT) to data_usage."""
+        with self._usage_lock:
+            self.data_usage += nbytes
+
+    def _meter(self, request):
+        """Function add the (estimated) bytes of a request and its response to data_usage, return them."""
+        sent = len(request.request.method) + len(request.request.url) + 12
+        sent += sum(len(k) + len(v) + 4 for k, v in request.request.headers.items())
+        sent += len(request.request.body or b"")
+        received = 17 + sum(len(k) + len(v) + 4 for k, v in request.headers.items())
+        try:
+            received += request.raw.tell()  # compressed bytes read from the wire
+        except (AttributeError, OSError):
+            received += int(request.headers.get("Content-Length") or len(request.content))
+        self.add_data_usage(sent + received)
+        return sent + received
+
+    def _acquire(self, priority=False):
+        """Function take a request from the budget of the account, raise BudgetExhausted if none is left."""
+        if self.budget is not None and not self.budget.acquire(self.sn, priority):
+            raise BudgetExhausted(
+                f"{self.sn}: Request budget of the account exhausted", retry_after=self.budget.retry_in()
+            )
+
+    def authorize(self):
+        """Function authorize"""
+        auth_ok = False  # default
+        headers = {"lang": "en_US", "content-type": "application/json"}
+        data = {
+            "email": self.ecoflow_username,
+            "password": base64.b64encode(self.ecoflow_password.encode()).decode(),
+            "scene": "IOT_APP",
+            "userType": "ECOFLOW",
+        }
+
+        self._acquire()
+        try:
+            url = self.url_iot_app
+            _LOGGER.info("Login to EcoFlow API %s", {url})
+            request = self._session().post(url, json=data, headers=headers, timeout=30)
+            self._meter(request)
+            response = self.get_json_response(request)
+
+        except ConnectionError as e:
+            error = f"Unable to connect to {self.url_iot_app}. Device might be offline."
+            raise EcoflowError(error) from e
+
+        try:
+            self.token = response["data"]["token"]
+            self.user_id = response["data"]["user"]["userId"]
+            user_name = response["data"]["user"].get("name", "<no user name>")
+            auth_ok = True
+        except KeyError as key:
+            raise Exception(f"Failed to extract key {key} from response: {response}")
+
+        _LOGGER.info("Successfully logged in: %s", {user_name})
+
+        self.get_device()  # collect device info
+
+        return auth_ok
+
+    def get_json_response(self, request):
+        """Function get json response"""
+        return self._parse_json_response(request.status_code, request.text, request.headers)
+
+    def _parse_json_response(self, status, text, headers=None):
+        """Function parse json response from status code and body"""
+        if status == 429:
+            self._throttled(f"Got HTTP status code {status}: {text}", headers)
+        if status != 200:
+            raise Exception(
+                f"Got HTTP status code {status}: {text}"
+            )
+        try:
+            response = json_loads(text)
+            response_message = response["message"]
+        except KeyError as key:
+            raise Exception(
+                f"Failed to extract key {key} from {json_loads(text)}"
+            )
+        except Exception as error:
+            raise Exception(f"Failed to parse response: {text} Error: {error}")
+
+        if response_message.lower() != "success":
+            if any(word in response_message.lower() for word in THROTTLE_MESSAGES):
+                self._throttled(response_message, headers)
+            raise Exception(f"{response_message}")
+
+        if self.budget is not None:
+            self.budget.record_success()
+        return response
+
+    def _throttled(self, message, headers):
+        """Function start the backoff of the account and raise RateLimited."""
+        try:
+            retry_after = int((headers or {}).get("Retry-After"))
+        except (TypeError, ValueError):
+            retry_after = None
+        if self.budget is not None:
+            retry_after = self.budget.record_throttled(retry_after)
+        _LOGGER.warning(f"{self.sn}: Throttled by the Ecoflow API, backing off for {retry_after}s: {message}")
+        raise RateLimited(f"Throttled by the Ecoflow API: {message}", retry_after=retry_after)
+
+    # Fetch the data from the PowerOcean device, which then constitues the Sensors
+    def fetch_data(self):
+        """Function fetch data from Url."""
+        # curl 'https://api-e.ecoflow.com/provider-service/user/device/detail?sn={self.sn}}' \
+        # -H 'authorization: Bearer {self.token}'
+
+        url = self.url_user_fetch
+        requests = _requests()
+        self._acquire()
+        try:
+            headers = {"authorization": f"Bearer {self.token}"}
+            if self._etag is not None and self._response is not None:
+                headers["If-None-Match"] = self._etag
+            with self.metrics.timer("http_latency"):
+                request = self._session().get(self.url_user_fetch, headers=headers, timeout=30)
+            self.metrics.record("wire_bytes", self._meter(request))
+
+            # Unchanged since the last poll: parse the kept response again (reports are cached)
+            if request.status_code == 304:
+                if self.budget is not None:
+                    self.budget.record_success()
+                return self.load_response(self._response)
+
+            self.metrics.record("payload_bytes", len(request.content))
+            with self.metrics.timer("json_decode"):
+                response = self.get_json_response(request)
+            self._etag = request.headers.get("ETag")
+
+            _LOGGER.debug("response_strange___%s", response)
+
+            return self.load_response(response)
+
+        except ConnectionError as e:
+            error = f"ConnectionError in fetch_data: Unable to connect to {url}. Device might be offline."
+            raise EcoflowError(error) from e
+
+        except requests.RequestException as e:
+            error = f"RequestException in fetch_data: Error while fetching data from {url}: {e}"
+            raise EcoflowError(error) from e
+
+    def load_response(self, response):
+        """Function store a full detail response and return its sensors."""
+        with self._lock, self.metrics.timer("extraction"):
+            self._response = response
+            return self._get_sensors(response)
+
+    # Single login and detail request for the config flow, on an aiohttp session (Home Assistant's).
+    # The authenticated instance (token and payload) is handed over to async_setup_entry,
+    # so setup does not log in and fetch again right after the flow.
+    async def async_probe(self, session):
+        """Function login, fetch the detail once, confirm the serial and return the device info."""
+        import asyncio
+        import aiohttp
+
+        headers = {"lang": "en_US", "content-type": "application/json"}
+        data = {
+            "email": self.ecoflow_username,
+            "password": base64.b64encode(self.ecoflow_password.encode()).decode(),
+            "scene": "IOT_APP",
+            "userType": "ECOFLOW",
+        }
+
+        try:
+            self._acquire()
+            async with session.post(self.url_iot_app, json=data, headers=headers, timeout=30) as request:
+                text = await request.text()
+                status = request.status
+                response_headers = request.headers
+            try:
+                response = self._parse_json_response(status, text, response_headers)
+                self.token = response["data"]["token"]
+                self.user_id = response["data"]["user"]["userId"]
+            except RateLimited:
+                raise
+            except Exception as error:
+                raise AuthenticationFailed(f"Login failed: {error}") from error
+
+            self._acquire()
+            headers = {"authorization": f"Bearer {self.token}"}
+            async with session.get(self.url_user_fetch, headers=headers, timeout=30) as request:
+                text = await request.text()
+                status = request.status
+                response_headers = request.headers
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise EcoflowError(f"Unable to connect to the Ecoflow API: {error}") from error
+
+        try:
+            response = self._parse_json_response(status, text, response_headers)
+        except RateLimited:
+            raise
+        except Exception as error:
+            raise EcoflowError(f"Failed to fetch the detail of {self.sn}: {error}") from error
+
+        # an unknown serial is answered with an empty detail (no inverter reports)
+        data = response.get("data") or {}
+        if not data.get("parallel") and not data.get("quota"):
+            raise EcoflowError(f"Serial number {self.sn} is not reported by the Ecoflow API")
+
+        self._response = response
+        self.probe_time = time.monotonic()
+        _LOGGER.info(f"{self.sn}: device confirmed with inverters {list(data.get('parallel') or {})}")
+
+        return self.get_device(response)
+
+    # Credentials for the Ecoflow MQTT broker, used by the optional streaming mode
+    def get_mqtt_certification(self):
+        """Function get MQTT broker url, port and credentials."""
+        url = self.url_mqtt_certification
+        requests = _requests()
+        self._acquire()
+        try:
+            headers = {"lang": "en_US", "authorization": f"Bearer {self.token}"}
+            request = self._session().get(url, params={"userId": self.user_id}, headers=headers, timeout=30)
+            self._meter(request)
+            response = self.get_json_response(request)
+
+        except requests.RequestException as e:
+            error = f"RequestException in get_mqtt_certification: Error while fetching {url}: {e}"
+            raise EcoflowError(error) from e
+
+        return response["data"]
+
+    # Send parameter changes (see commands.py) to one inverter, e.g. {"emsCtrlLedBright": 50}
+    def set_parameters(self, params, inverter_sn=None):
+        """Function set device parameters of an inverter (default: the configured serial)."""
+        url = self.url_user_set
+        if url is None:
+            raise EcoflowError(f"{self.sn}: No endpoint known for setting parameters")
+        inverter_sn = inverter_sn or self.sn
+        requests = _requests()
+        self._acquire(priority=True)  # user changes may use the share of other sites
+        try:
+            headers = {"lang": "en_US", "authorization": f"Bearer {self.token}"}
+            request = self._session().put(
+                url, json={"sn": inverter_sn, "params": params}, headers=headers, timeout=30
+            )
+            self._meter(request)
+            self.get_json_response(request)
+
+        except requests.RequestException as e:
+            error = f"RequestException in set_parameters: Error while sending {params} to {url}: {e}"
+            raise EcoflowError(error) from e
+
+        except RateLimited:
+            raise
+
+        except Exception as e:
+            raise EcoflowError(f"Error while sending {params} to {url}: {e}")
+
+        _LOGGER.info(f"{inverter_sn}: parameters set: {params}")
+
+    # Samples of the energy counters during a gap, for the backfill of the statistics (see backfill.py)
+    def fetch_history(self, begin, end):
+        """Function fetch the counter samples between begin and end (epoch seconds), {unique_id: [(time, value)]}."""
+        if self.url_history is None:
+            return {}
+        url = self.url_history
+        requests = _requests()
+        self._acquire()
+        try:
+            headers = {"lang": "en_US", "authorization": f"Bearer {self.token}"}
+            params = {"sn": self.sn, "begin": int(begin), "end": int(end)}
+            request = self._session().get(url, params=params, headers=headers, timeout=30)
+            self._meter(request)
+            response = self.get_json_response(request)
+
+        except requests.RequestException as e:
+            error = f"RequestException in fetch_history: Error while fetching {url}: {e}"
+            raise EcoflowError(error) from e
+
+        except RateLimited:
+            raise
+
+        except Exception as e:
+            raise EcoflowError(f"Error while fetching the history from {url}: {e}")
+
+        # {"samples": [{"time": epoch seconds, "values": {unique_id: value}}]}
+        history = {}
+        for sample in (response.get("data") or {}).get("samples") or []:
+            for unique_id, value in (sample.get("values") or {}).items():
+                history.setdefault(unique_id, []).append((sample["time"], value))
+        return history
+
+    # The settable parameters are parsed once per parse (poll or report update) into
+    # self.parameters, which is replaced as a whole: reads need no lock and no decoding.
+    def watch_parameters(self, parameter_reports):
+        """Function set the parameters {key: report} kept parsed for get_parameter."""
+        with self._lock:
+            self.parameter_reports = dict(parameter_reports)
+            if self._response is not None:
+                self._update_parameters()
+
+    def get_parameter(self, key, inverter_sn=None):
+        """Function return the reported value of a settable parameter (default: master), None if not reported."""
+        return self.parameters.get(inverter_sn or getattr(self, "master_sn", None), {}).get(key)
+
+    def _update_parameters(self, inverter_sn=None):
+        """Function parse the settable parameters of one inverter, or of all."""
+        parameters = dict(self.parameters)
+        parallel = self._response["data"].get("parallel", {})
+        for sn in [inverter_sn] if inverter_sn else parallel:
+            inverter_data = parallel[sn]
+            values = {}
+            for report in set(self.parameter_reports.values()):
+                d = inverter_data.get(report) or {}
+                if report == "JTS1_BP_STA_REPORT":
+                    # limits are the same for all packs, take them from the first pack
+                    blob = next((b for b in d.values() if isinstance(b, str) and '"bpSn"' in b), None)
+                    d = json_loads(blob) if blob else {}
+                for key, key_report in self.parameter_reports.items():
+                    if key_report == report and d.get(key) is not None:
+                        values[key] = d[key]
+            parameters[sn] = values
+        self.parameters = parameters
+
+    # Apply a single report update (e.g. received over MQTT) to the last full payload.
+    # Only the touched report is extracted again and merged into the last sensor set.
+    def apply_report(self, inverter_sn, report, params):
+        """Function apply report update and return the sensors."""
+        with self._lock:
+            if self._response is None or self._sensors is None:
+                return None
+
+            parallel = self._response["data"].get("parallel", {})
+            if inverter_sn not in parallel:
+                _LOGGER.debug(f"{inverter_sn}: report {report} for unknown inverter ignored")
+                return None
+
+            inverter_data = parallel[inverter_sn]
+            inverter_data.setdefault(report, {}).update(params)
+            inverter_string = "_master" if inverter_sn == self.master_sn else "_slave"
+            cache_key = (inverter_sn, report)
+            # extract again, even if updateTime is unchanged
+            self._report_times.pop(cache_key, None)
+            previous = self._report_cache.pop(cache_key, (None, {}))[1]
+            self.changed_reports = set()
+
+            sensors = self._sensors
+            stage = self._report_stage(report)
+            if stage is not None:
+                self._get_sensors_report(stage, report, inverter_data, inverter_sn, inverter_string, sensors)
+                for unique_id in previous.keys() - self._report_cache[cache_key][1].keys():
+                    sensors.pop(unique_id, None)  # no longer in the report
+            if report == "JTS1_PARALLEL_ENERGY_STREAM_REPORT" and inverter_sn == self.master_sn:
+                self._get_sensors_powerflow_total(self._response, sensors)
+
+            self.stale_endpoints = self._get_stale_endpoints()
+            self._get_faults(inverter_data, inverter_sn)
+            if report in self.parameter_reports.values():
+                self._update_parameters(inverter_sn)
+
+            return dict(sensors)
+
+    def _report_stage(self, report):
+        """Function return the extraction stage of a report, None if it has no sensors of its own."""
+        if report in REPORT_STAGES:
+            return getattr(self, REPORT_STAGES[report])
+        handler = REPORT_HANDLERS.get(report)
+        if handler is None:
+            return None
+
+        def stage(inverter_data, inverter_sn, inverter_string, data):
+            return handler(self, report, inverter_data[report], inverter_sn, inverter_string)
+
+        return stage
+
+    def __get_unit(self, key):
+        """Function get unit from key Name."""
+        if key.endswith(("pwr", "Pwr", "Power")):
+            unit = "W"
+        elif key.endswith(("amp", "Amp")):
+            unit = "A"
+        elif key.endswith(("soc", "Soc", "soh", "Soh")):
+            unit = "%"
+        elif key.endswith(("vol", "Vol")):
+            unit = "V"
+        elif key.endswith(("Watth", "Energy")):
+            unit = "Wh"
+        elif "Generation" in key:
+            unit = "kWh"
+        elif key.startswith("bpTemp"):  # TODO: alternative: 'Temp' in key
+            unit = "°C"
+        else:
+            unit = None
+
+        return unit
+
+    def _normalize_value(self, key, value):
+        """Function convert a raw value to its native type: float, datetime or bool."""
+        if isinstance(value, (bool, int, float)) or value is None:
+            if key in FLAG_KEYS:
+                return bool(value)
+            return value
+        if isinstance(value, str):
+            if key in DATETIME_KEYS:
+                try:
+                    return datetime.strptime(value, DATETIME_FORMAT)
+                except ValueError:
+                    return value
+            # numeric strings of measured values, e.g. todayElectricityGeneration: "25.05"
+            if self.__get_unit(key) is not None:
+                try:
+                    return float(value)
+                except ValueError:
+                    return value
+        return value
+
+    def __get_description(self, key):
+        # TODO: hier könnte man noch mehr definieren bzw ein translation dict erstellen +1
+        # Comment: Ich glaube hier brauchen wir n
+        description = key  # default description
+        if key == "sysLoadPwr":
+            description = "Hausnetz"
+        if key == "sysGridPwr":
+            description = "Stromnetz"
+        if key == "mpptPwr":
+            description = "Solarertrag"
+        if key == "bpPwr":
+            description = "Batterieleistung"
+        if key == "bpSoc":
+            description = "Ladezustand der Batterie"
+        if key == "online":
+            description = "Online"
+        if key == "systemName":
+            description = "System Name"
+        if key == "createTime":
+            description = "Installations Datum"
+        # Battery descriptions
+        if key == "bpVol":
+            description = "Batteriespannung"
+        if key == "bpAmp":
+            description = "Batteriestrom"
+        if key == "bpCycles":
+            description = "Ladezyklen"
+        if key == "bpTemp":
+            description = "Temperatur der Batteriezellen"
+
+        return description
+
+    # Skip the extraction of reports which did not change since the last poll
+    def _get_sensors_report(self, stage, report, inverter_data, inverter_sn, inverter_string, sensors):
+        """Function run extraction stage only for a changed report, else reuse its sensors."""
+        cache_key = (inverter_sn, report)
+        cached = self._report_cache.get(cache_key)
+
+        # the updateTime of a report is its fingerprint, only reports without one are serialized
+        update_time = (inverter_data.get(report) or {}).get("updateTime")
+        if update_time is not None:
+            fingerprint = ("updateTime", update_time)
+            if cached is not None and cached[0] == fingerprint:
+                dict.update(sensors, cached[1])
+                return sensors
+        else:
+            fingerprint = hash(json.dumps(inverter_data.get(report), separators=(",", ":")))
+        self._track_report_time(cache_key, update_time)
+
+        if cached is not None and cached[0] == fingerprint:
+            data = cached[1]
+        else:
+            with self.metrics.timer(f"extraction.{report}"):
+                data = stage(inverter_data, inverter_sn, inverter_string, {})
+            self._report_cache[cache_key] = (fingerprint, data)
+            self.changed_reports.add(cache_key)
+
+        dict.update(sensors, data)
+
+        return sensors
+
+    # Freshness of the reports: updateTime is parsed once per change in the site timezone,
+    # reports without a parsable time are aged from the moment their updateTime last moved
+    def _track_report_time(self, cache_key, update_time):
+        if update_time is None:
+            self._report_times.pop(cache_key, None)
+            return
+
+        reported_at = None
+        if self._timezone is not None:
+            try:
+                reported_at = datetime.strptime(update_time, DATETIME_FORMAT).replace(tzinfo=self._timezone).timestamp()
+            except ValueError:
+                pass
+        self._report_times[cache_key] = (update_time, reported_at or time.time())
+
+    def report_age(self, inverter_sn, report):
+        """Function return the age in seconds of a report, None if unknown."""
+        times = self._report_times.get((inverter_sn, report))
+        if times is None:
+            return None
+        return max(0.0, time.time() - times[1])
+
+    def _get_stale_endpoints(self):
+        """Function return the unique ids of endpoints extracted from stale reports or packs."""
+        stale = set()
+        for inverter_sn, report in self._report_times:
+            max_age = STALE_REPORT_AGE.get(report)
+            if max_age is None or (inverter_sn, report) not in self._report_cache:
+                continue
+            if self.report_age(inverter_sn, report) > max_age:
+                stale.update(self._report_cache[(inverter_sn, report)][1])
+
+        # battery packs carry their own epoch timestamp (bpTimestamp)
+        now = time.time()
+        for bp_timestamp, unique_ids in self._pack_times.values():
+            if now - bp_timestamp > STALE_REPORT_AGE["JTS1_BP_STA_REPORT"]:
+                stale.update(unique_ids)
+
+        return stale
+
+    # Endpoint of a single report value, used by the pluggable extractors in ecology.py
+    def _make_endpoint(self, report, key, value, inverter_sn, inverter_string, prefix, icon=None):
+        """Function return the endpoint of a report value."""
+        unique_id = f"{inverter_sn}_{report}_{prefix}{key}{inverter_string}"
+        return PowerOceanEndPoint(
+            internal_unique_id=unique_id,
+            serial=inverter_sn,
+            name=f"{inverter_sn}_{prefix}{key}{inverter_string}",
+            friendly_name=f"{prefix}{key}{inverter_string}",
+            value=self._normalize_value(key, value),
+            unit=self.__get_unit(key),
+            description=self.__get_description(key),
+            icon=icon,
+        )
+
+    # Attached devices (heat pump, heating rod, EV charger, PV inverter), dispatched per report
+    def _get_sensors_ecology(self, inverter_data, inverter_sn, inverter_string, sensors):
+        for report in REPORT_HANDLERS:
+            d = inverter_data.get(report)
+            if not d or d.keys() <= {"updateTime"}:  # no such device on this site
+                continue
+            sensors = self._get_sensors_report(
+                self._report_stage(report), report, inverter_data, inverter_sn, inverter_string, sensors
+            )
+
+        return sensors
+
+    # Power flows (PV/battery/house/grid) of one inverter from 'JTS1_ENERGY_STREAM_REPORT'
+    def _get_sensors_powerflow(self, inverter_data, inverter_sn, inverter_string, sensors):
+        flows = flows_from_stream(inverter_data.get("JTS1_ENERGY_STREAM_REPORT") or {})
+        dict.update(sensors, self._get_powerflow_endpoints(flows, inverter_sn, inverter_string))
+
+        return sensors
+
+    # Power flows of the whole system from 'JTS1_PARALLEL_ENERGY_STREAM_REPORT', or else
+    # from the system values in response['data']
+    def _get_sensors_powerflow_total(self, response, sensors):
+        d = self.master_data.get("JTS1_PARALLEL_ENERGY_STREAM_REPORT") or response["data"]
+        flows = flows_from_stream(d)
+        dict.update(sensors, self._get_powerflow_endpoints(flows, self.sn, ""))
+
+        return sensors
+
+    def _get_powerflow_endpoints(self, flows, serial, inverter_string):
+        data = {}
+        for flow, value in (flows or {}).items():
+            name = f"powerflow_{flow}{inverter_string}"
+            unique_id = f"{serial}_{name}"
+            data[unique_id] = PowerOceanEndPoint(
+                internal_unique_id=unique_id,
+                serial=serial,
+                name=f"{serial}_{name}",
+                friendly_name=name,
+                value=value,
+                unit="W",
+                description=f"Energiefluss {flow}",
+                icon="mdi:transit-connection-variant",
+            )
+
+        return data
+
+    def pop_fault_changes(self):
+        """Function return and clear the fault changes since the last call."""
+        with self._lock:
+            changes, self.fault_changes = self.fault_changes, []
+        return changes
+
+    def _get_faults(self, inverter_data, inverter_sn):
+        """Function decode the active faults of an inverter and record the changes."""
+        faults = decode_faults(inverter_data)
+        for module, added, removed in diff_faults(self.faults.get(inverter_sn, {}), faults):
+            self.fault_changes.append((inverter_sn, module, added, removed))
+        self.faults[inverter_sn] = faults
+
+    def _get_sensors(self, response):
+        # check if dual master and slave inverter system
+        # and if so get serial numbers from from response['data']
+        
+        serials = self._get_serial_numbers(response)
+
+        if serials == 0 :
+            _LOGGER.debug(f"single inverter system")
+            return
+        elif serials == 2:
+            
+
+            _LOGGER.debug(f"serial_numbers__{serials}")
+            _LOGGER.debug(f"master_serial_number__{self.master_sn}")
+            _LOGGER.debug("master_data__%s", self.master_data)
+
+        
+        
+            # get sensors from response['data']
+
+            # _LOGGER.debug(f"sensors_init__{sensors}")
+        
+            self.changed_reports = set()
+            self._timezone = self._get_timezone(response["data"].get("timezone"))
+            sensors = self.__get_sensors_data(response)
+
+            _LOGGER.debug("sensors_1__%s", sensors)
+
+            # get sensors from 'JTS1_ENERGY_STREAM_REPORT'
+            # sensors = self.__get_sensors_energy_stream(response, sensors)  # is currently not in use
+
+            # get sensors from 'JTS1_EMS_CHANGE_REPORT'
+            # siehe parameter_selected.json    #  get bpSoc from ems_change
+
+            _LOGGER.debug("sensors_2__%s", sensors)
+
+        
+            inverter_data = self.master_data
+            inverter_sn = self.master_sn
+        
+            sensors = self._get_sensors_report(
+                self._get_sensors_ems_change, "JTS1_EMS_CHANGE_REPORT", inverter_data, inverter_sn, "_master", sensors
+            )
+            _LOGGER.debug("sensors_3__%s", sensors)
+            sensors = self._get_sensors_report(
+                self._get_sensors_battery, "JTS1_BP_STA_REPORT", inverter_data, inverter_sn, "_master", sensors
+            )
+            _LOGGER.debug("sensors_4__%s", sensors)
+            sensors = self._get_sensors_report(
+                self._get_sensors_ems_heartbeat, "JTS1_EMS_HEARTBEAT", inverter_data, inverter_sn, "_master", sensors
+            )
+
+            _LOGGER.debug("sensors_5__%s", sensors)
+
+            inverter_data = self.slave_data
+            inverter_sn = self.slave_sn
+            
+            sensors = self._get_sensors_report(
+                self._get_sensors_ems_change, "JTS1_EMS_CHANGE_REPORT", inverter_data, inverter_sn, "_slave", sensors
+            )
+
+            _LOGGER.debug("sensors_6__%s", sensors)
+            sensors = self._get_sensors_report(
+                self._get_sensors_battery, "JTS1_BP_STA_REPORT", inverter_data, inverter_sn, "_slave", sensors
+            )
+            _LOGGER.debug("sensors_7__%s", sensors)
+            sensors = self._get_sensors_report(
+                self._get_sensors_ems_heartbeat, "JTS1_EMS_HEARTBEAT", inverter_data, inverter_sn, "_slave", sensors
+            )
+            
+            _LOGGER.debug("sensors_8__%s", sensors)
+
+            # get info from attached devices  => heat pump, heating rod, EV charger, PV inverter
+            sensors = self._get_sensors_ecology(self.master_data, self.master_sn, "_master", sensors)
+            sensors = self._get_sensors_ecology(self.slave_data, self.slave_sn, "_slave", sensors)
+
+            # get power flows per inverter and in total  => JTS1_ENERGY_STREAM_REPORT
+            for inverter_data, inverter_sn, inverter_string in [
+                (self.master_data, self.master_sn, "_master"),
+                (self.slave_data, self.slave_sn, "_slave"),
+            ]:
+                sensors = self._get_sensors_report(
+                    self._get_sensors_powerflow, "JTS1_ENERGY_STREAM_REPORT", inverter_data, inverter_sn, inverter_string, sensors
+                )
+            sensors = self._get_sensors_powerflow_total(response, sensors)
+
+            self.stale_endpoints = self._get_stale_endpoints()
+
+            # get active faults from 'JTS1_ERROR_CHANGE_REPORT', 'JTS1_ERROR_CODE_MASK_REPORT' and mppt codes
+            self._get_faults(self.master_data, self.master_sn)
+            self._get_faults(self.slave_data, self.slave_sn)
+            if self.parameter_reports:
+                self._update_parameters()
+    
+            # get info from batteries  => JTS1_BP_STA_REPORT
+           
+    
+            # get info from PV strings  => JTS1_EMS_HEARTBEAT
+    
+    
+            self._sensors = dict(sensors)
+            return sensors
+        else:
+            _LOGGER.debug(f"more than two inverters aborting")
+            
+
+    def __get_sensors_data(self, response):
+        d = response["data"].copy()
+
+        # sensors not in use: note, bpSoc is taken from the EMS CHANGE report
+        # [ 'bpSoc', 'sysBatChgUpLimit', 'sysBatDsgDownLimit','sysGridSta', 'sysOnOffMachineStat',
+        #   'location', 'timezone', 'quota']
+
+        sens_select = [
+            "sysLoadPwr",
+            "sysGridPwr",
+            "mpptPwr",
+            "bpPwr",
+            "online",
+            "todayElectricityGeneration",
+            "monthElectricityGeneration",
+            "yearElectricityGeneration",
+            "totalElectricityGeneration",
+            "systemName",
+            "createTime",
+        ]
+
+        sensors = dict()  # start with empty dict
+        for key, value in d.items():
+            if key in sens_select:  # use only sensors in sens_select
+                if not isinstance(value, dict):
+                    # default uid, unit and descript
+                    unique_id = f"{self.sn}_{key}"
+                    special_icon = None
+                    if key == "mpptPwr":
+                        special_icon = "mdi:solar-power"
+
+                    sensors[unique_id] = PowerOceanEndPoint(
+                        internal_unique_id=unique_id,
+                        serial=self.sn,
+                        name=f"{self.sn}_{key}",
+                        friendly_name=key,
+                        value=self._normalize_value(key, value),
+                        unit=self.__get_unit(key),
+                        description=self.__get_description(key),
+                        icon=special_icon,
+                    )
+
+        return sensors
+        
+    def _get_serial_numbers(self, response):
+      
+        p = response["data"]["parallel"]
+        _LOGGER.debug(f"parallel_present__{len(p)}")
+
+        if len(p) == 0 :
+            return 0
+        
+
+        keys_2 = p.keys()
+        _LOGGER.debug(f"serial_p_keys2__{keys_2}")
+    
+        for key in p.keys():
+            pp = response["data"]["parallel"][key]
+            keys_3 = pp.keys()
+            _LOGGER.debug(f"serial_pp_keys___{keys_3}")
+
+        self.slave_sn = next(iter(keys_2))
+        self.master_sn = next(reversed(keys_2))
+
+        self.master_data = response["data"]["parallel"][self.master_sn]
+        self.slave_data = response["data"]["parallel"][self.slave_sn]
+        
+        return len(p)
+
+
+    
+
+
+    # Note, this report is currently not in use. Sensors are taken from response['data']
+    # def __get_sensors_energy_stream(self, response, sensors):
+    #     report = "JTS1_ENERGY_STREAM_REPORT"
+    #     d = response["data"]["quota"][report]
+    #     prefix = (
+    #         "_".join(report.split("_")[1:3]).lower() + "_"
+    #     )  # used to construct sensor name
+    #
+    #     # sens_all = ['bpSoc', 'mpptPwr', 'updateTime', 'bpPwr', 'sysLoadPwr', 'sysGridPwr']
+    #     sens_select = d.keys()
+    #     data = {}
+    #     for key, value in d.items():
+    #         if key in sens_select:  # use only sensors in sens_select
+    #             # default uid, unit and descript
+    #             unique_id = f"{self.sn}_{report}_{key}"
+    #
+    #             data[unique_id] = PowerOceanEndPoint(
+    #                 internal_unique_id=unique_id,
+    #                 serial=self.sn,
+    #                 name=f"{self.sn}_{prefix+key}",
+    #                 friendly_name=prefix + key,
+    #                 value=value,
+    #                 unit=self.__get_unit(key),
+    #                 description=self.__get_description(key),
+    #                 icon=None,
+    #             )
+    #     dict.update(sensors, data)
+    #
+    #     return sensors
+
+    def _get_sensors_ems_change(self, inverter_data, inverter_sn, inverter_string, sensors):
+        report = "JTS1_EMS_CHANGE_REPORT"
+        d = inverter_data[report]
+
+        sens_select = [
+            "bpTotalChgEnergy",
+            "bpTotalDsgEnergy",
+            "bpSoc",
+            "bpOnlineSum",  # number of batteries
+            "emsCtrlLedBright",
+        ]
+
+        # add mppt and inverter AC/DC Warning/Fault Codes
+        keys = d.keys()
+
+        wfc = list(filter(EMS_CODE_KEYS.match, keys))  # warning/fault code keys
+        sens_select += wfc
+
+       
+        
+        data = {}
+        for key, value in d.items():
+            if key in sens_select:  # use only sensors in sens_select
+                # default uid, unit and descript
+                unique_id = f"{inverter_sn}_{report}_{key}{inverter_string}"
+
+                data[unique_id] = PowerOceanEndPoint(
+                    internal_unique_id=unique_id,
+                    serial=inverter_sn,
+                    name=f"{inverter_sn}_{key}{inverter_string}",
+                    friendly_name = key + inverter_string,
+                    value=self._normalize_value(key, value),
+                    unit=self.__get_unit(key),
+                    description=self.__get_description(key),
+                    icon=None,
+                )
+        dict.update(sensors, data)
+
+        return sensors
+
+    # Pack numbers are assigned once per pack serial (bpSn), ordered by serial, and cached
+    # across polls so ids do not shift when the order of the report changes.
+    # Placeholders such as the "" key with empty arrays are skipped without decoding.
+    def _get_pack_index(self, inverter_sn, d):
+        """Function return {report key: pack number} of the packs in JTS1_BP_STA_REPORT."""
+        index = self._pack_index.setdefault(inverter_sn, {})  # bpSn -> pack number
+        keys = {}  # report key -> bpSn, of this poll
+        for key, blob in d.items():
+            if not key or not isinstance(blob, str) or '"bpSn"' not in blob:
+                continue
+            bp_sn = self._pack_serials.get((inverter_sn, key))
+            if bp_sn is None or f'"{bp_sn}"' not in blob:  # new key, or another pack under the key
+                bp_sn = json_loads(blob).get("bpSn")
+                if not bp_sn:
+                    continue
+                self._pack_serials[(inverter_sn, key)] = bp_sn
+            keys[key] = bp_sn
+        for cached in [k for k in self._pack_serials if k[0] == inverter_sn and k[1] not in keys]:
+            del self._pack_serials[cached]  # pack no longer reported under this key
+
+        for bp_sn in sorted(set(keys.values()) - set(index), key=self._decode_serial):
+            index[bp_sn] = len(index) + 1
+            _LOGGER.debug(f"{inverter_sn}: battery pack {bp_sn} registered as pack {index[bp_sn]}")
+
+        return {key: index[bp_sn] for key, bp_sn in sorted(keys.items(), key=lambda k: index[k[1]])}
+
+    @property
+    def timezone(self):
+        """Timezone of the site (ZoneInfo) from the last detail response, None if unknown."""
+        return self._timezone
+
+    def _get_timezone(self, name):
+        """Function return the site timezone, None if unknown."""
+        if self._timezone is not None and str(self._timezone) == name:
+            return self._timezone
+        if name == self._timezone_invalid:  # not looked up again on every poll
+            return None
+        try:
+            return ZoneInfo(name)
+        except (ValueError, TypeError, ZoneInfoNotFoundError):
+            _LOGGER.debug(f"{self.sn}: unknown timezone {name!r}, report ages taken from the time of change")
+            self._timezone_invalid = name
+            return None
+
+    def _decode_serial(self, bp_sn):
+        """Function decode a base64 pack serial (bpSn), used for ordering the packs."""
+        try:
+            return base64.b64decode(bp_sn).decode()
+        except ValueError:
+            return bp_sn
+
+    def _get_sensors_battery(self, inverter_data, inverter_sn, inverter_string, sensors):
+        report = "JTS1_BP_STA_REPORT"
+        d = inverter_data[report]
+        keys = list(d.keys())
+        
+        _LOGGER.debug(f"inverter__{inverter_sn}")
+        _LOGGER.debug(f"batt_keys__{keys}")
+ 
+        # loop over N batteries, numbered by the cached pack index
+        pack_index = self._get_pack_index(inverter_sn, d)
+
+        _LOGGER.debug(f"batts__{pack_index}")
+ 
+        bat_sens_select = [
+            "bpPwr",
+            "bpSoc",
+            "bpSoh",
+            "bpVol",
+            "bpAmp",
+            "bpCycles",
+            "bpSysState",
+            "bpRemainWatth",
+            "bpTemp",
+        ]
+
+        data = {}
+        prefix = "_bpack"
+
+        for bat, ibat in pack_index.items():
+            name = prefix + "%i_" % ibat
+            _LOGGER.debug(f"batty__{ibat}{bat}")
+            _LOGGER.debug(f"batts_name__{name}")
+            d_bat = json_loads(d[bat])
+            _LOGGER.debug(f"batts_dbat__{d_bat}")
+
+            for key, value in d_bat.items():
+                _LOGGER.debug(f"batts_dbat_items__{d_bat.items}")
+                if key in bat_sens_select:
+                    # default uid, unit and descript
+                    unique_id = f"{inverter_sn}_{report}_{bat}_{key}"
+                    description_tmp = f"{name}" + self.__get_description(key)
+                    special_icon = None
+                    if key == "bpAmp":
+                        special_icon = "mdi:current-dc"
+                    if key == "bpTemp":
+                        temp = d_bat[key]
+                        value = sum(temp) / len(temp)
+                        _LOGGER.debug(f"batts_temps__{temp}")
+                        _LOGGER.debug(f"batts_avg_temp__{value}")
+                    data[unique_id] = PowerOceanEndPoint(
+                        internal_unique_id=unique_id,
+                        serial=inverter_sn,
+                        name=f"{inverter_sn}_{key}",
+                        friendly_name= key + name +  inverter_string,
+
+                        value=self._normalize_value(key, value),
+                        unit=self.__get_unit(key),
+                        description=description_tmp,
+                        icon=special_icon,
+                    )
+
+            # per-cell voltages and temperature probes as compact arrays
+            dict.update(data, self._get_sensors_cell_arrays(d_bat, inverter_sn, report, bat, name, inverter_string))
+
+            # pack timestamp, for the staleness of its sensors
+            if isinstance(d_bat.get("bpTimestamp"), (int, float)):
+                unique_ids = [uid for uid in data if uid.startswith(f"{inverter_sn}_{report}_{bat}_")]
+                self._pack_times[(inverter_sn, bat)] = (d_bat["bpTimestamp"], unique_ids)
+
+            # compute mean temperature of cells
+     #       key = "bpTemp"
+     #       temp = d_bat[key]
+     #       value = sum(temp) / len(temp)
+     #       unique_id = f"{inverter_sn}_{report}_{bat}_{key}"
+     #       description_tmp = f"{name}" + self.__get_description(key)
+     #       _LOGGER.debug(f"batts_description_tmp__{description_tmp}")
+     #       data[unique_id] = PowerOceanEndPoint(
+     #           internal_unique_id=unique_id,
+     #           serial=inverter_sn,
+     #           name=f"{inverter_sn}_{name + key}",
+     #           friendly_name = inverter_string + name + key,
+     #           value=value,
+     #           unit=self.__get_unit(key),
+     #           description=description_tmp,
+     #           icon=None,
+     #       )
+
+        dict.update(sensors, data)
+
+        return sensors
+
+    # Cell voltages (bpCellVol, mV) and temperature probes (bpTemp) of one pack: the arrays
+    # are kept once in the attributes of the delta sensor, plus min/max/delta values
+    def _get_sensors_cell_arrays(self, d_bat, inverter_sn, report, bat, name, inverter_string):
+        data = {}
+        for key, unit, label in CELL_ARRAYS:
+            values = d_bat.get(key)
+            if not values:
+                continue
+
+            values = tuple(values)
+            derived = {
+                "Min": min(values),
+                "Max": max(values),
+                "Delta": round(max(values) - min(values), 3),
+            }
+            for suffix, value in derived.items():
+                unique_id = f"{inverter_sn}_{report}_{bat}_{key}{suffix}"
+                data[unique_id] = PowerOceanEndPoint(
+                    internal_unique_id=unique_id,
+                    serial=inverter_sn,
+                    name=f"{inverter_sn}_{key}{suffix}",
+                    friendly_name=key + suffix + name + inverter_string,
+                    value=value,
+                    unit=unit,
+                    description=f"{name}{label} {suffix.lower()}",
+                    icon=None,
+                    attributes={label: values} if suffix == "Delta" else None,
+                )
+
+        return data
+
+    def _get_sensors_ems_heartbeat(self, inverter_data, inverter_sn, inverter_string, sensors):
+        report = "JTS1_EMS_HEARTBEAT"
+        d = inverter_data[report]
+        # sens_select = d.keys()  # 68 Felder
+        sens_select = [
+            "bpRemainWatth",
+            "emsBpAliveNum",
+            "emsBpPower",
+            "pcsActPwr",
+            "pcsMeterPower",
+
+        ]
+        _LOGGER.debug(f"heartbeat1__{inverter_string}")
+
+        data = {}
+        for key, value in d.items():
+            if key in sens_select:
+                # default uid, unit and descript
+                unique_id = f"{inverter_sn}_{report}_{key}_{inverter_string}"
+                description_tmp = self.__get_description(key)
+                data[unique_id] = PowerOceanEndPoint(
+                    internal_unique_id=unique_id,
+                    serial=inverter_sn,
+                    name=f"{inverter_sn}_{key}{inverter_string}",
+                    friendly_name= key + inverter_string,
+                    value=self._normalize_value(key, value),
+                    unit=self.__get_unit(key),
+                    description=description_tmp,
+                    icon=None,
+                )
+                _LOGGER.debug(f"heartbeat2__{inverter_sn}_{key}{inverter_string}")
+                _LOGGER.debug(f"heartbeat3__{key}{inverter_string}")
+
+
+        # special for phases
+        phases = ["pcsAPhase", "pcsBPhase", "pcsCPhase"]
+        for i, phase in enumerate(phases):
+            for key, value in d[phase].items():
+                name = phase + "_" + key +  inverter_string
+                unique_id = f"{inverter_sn}_{report}_{name}"
+
+                data[unique_id] = PowerOceanEndPoint(
+                    internal_unique_id=unique_id,
+                    serial=inverter_sn,
+                    name=f"{inverter_sn}_{name}",
+                    friendly_name=f"{name}",
+                    value=self._normalize_value(key, value),
+                    unit=self.__get_unit(key),
+                    description=self.__get_description(key),
+                    icon=None,
+                )
+                _LOGGER.debug(f"heartbeat4__{inverter_sn}_{name}")
+                _LOGGER.debug(f"heartbeat5__{name}")
+
+
+        # special for mpptPv
+        n_strings = len(d["mpptHeartBeat"][0]["mpptPv"])  # TODO: auch als Sensor?
+        mpptpvs = []
+        for i in range(1, n_strings + 1):
+            mpptpvs.append(f"mpptPv{i}")
+        mpptPv_sum = 0.0
+        for i, mpptpv in enumerate(mpptpvs):
+            for key, value in d["mpptHeartBeat"][0]["mpptPv"][i].items():
+                unique_id = f"{inverter_sn}_{report}_mpptHeartBeat_{mpptpv}_{key}"
+                special_icon = None
+                if key.endswith("amp"):
+                    special_icon = "mdi:current-dc"
+                if key.endswith("pwr"):
+                    special_icon = "mdi:solar-power"
+
+                data[unique_id] = PowerOceanEndPoint(
+                    internal_unique_id=unique_id,
+                    serial=inverter_sn,
+                    name=f"{inverter_sn}_{mpptpv}_{key}{inverter_string}",
+                    friendly_name=f"{mpptpv}_{key}{inverter_string}",
+                    value=self._normalize_value(key, value),
+                    unit=self.__get_unit(key),
+                    description=self.__get_description(key),
+                    icon=special_icon,
+                )
+                # sum power of all strings
+                if key == "pwr":
+                    mpptPv_sum += value
+
+        # create total power sensor of all strings
+        name = "mpptPv_pwrTotal"
+        unique_id = f"{inverter_sn}_{report}_mpptHeartBeat_{name}"
+
+        data[unique_id] = PowerOceanEndPoint(
+            internal_unique_id=unique_id,
+            serial=inverter_sn,
+            name=f"{inverter_sn}_{name}{inverter_string}",
+            friendly_name=f"{name}{inverter_string}",
+            value=mpptPv_sum,
+            unit=self.__get_unit(key),
+            description="Solarertrag aller Strings",
+            icon="mdi:solar-power",
+        )
+
+        dict.update(sensors, data)
+
+        return sensors
+
+
+class AuthenticationFailed(Exception):
+    """Exception to indicate authentication failure."""
+
+
+class EcoflowError(Exception):
+    """Exception to indicate a failed request to the Ecoflow API."""
+
+
+class RateLimited(EcoflowError):
+    """Exception to indicate a throttling response of the Ecoflow API."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds until requests are sent again
+
+
+class BudgetExhausted(RateLimited):
+    """Exception to indicate a request not sent because the budget of the account is used up."""
@@ -0,0 +1,59 @@
+"""ecology.py: extractors for devices attached to the PowerOcean (heat pump, heating rod, EV charger, PV inverter)."""
+
+
+def extract_flat(ecoflow, report, d, inverter_sn, inverter_string, prefix):
+    """Extract the scalar values of a report, and of its nested objects one level deep."""
+    data = {}
+    for key, value in d.items():
+        if key == "updateTime":
+            continue
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                if isinstance(sub_value, (bool, int, float, str)):
+                    endpoint = ecoflow._make_endpoint(
+                        report, sub_key, sub_value, inverter_sn, inverter_string, f"{prefix}{key}_"
+                    )
+                    data[endpoint.internal_unique_id] = endpoint
+        elif isinstance(value, (bool, int, float, str)):
+            endpoint = ecoflow._make_endpoint(report, key, value, inverter_sn, inverter_string, prefix)
+            data[endpoint.internal_unique_id] = endpoint
+
+    return data
+
+
+def extract_heat_pump(ecoflow, report, d, inverter_sn, inverter_string):
+    """Extract JTS1_LOGY_DEV_REPORT, only if a heat pump is bound (HPReport.devSn is set)."""
+    hp = d.get("HPReport") or {}
+    if not hp.get("devSn"):
+        return {}
+
+    return extract_flat(ecoflow, report, hp, inverter_sn, inverter_string, "hp_")
+
+
+def extract_pv_inverter(ecoflow, report, d, inverter_sn, inverter_string):
+    """Extract the power of an additional PV inverter (pvInvPwr)."""
+    if "pvInvPwr" not in d:
+        return {}
+
+    endpoint = ecoflow._make_endpoint(report, "pvInvPwr", d["pvInvPwr"], inverter_sn, inverter_string, "", "mdi:solar-power")
+    return {endpoint.internal_unique_id: endpoint}
+
+
+def _flat(prefix):
+    def extract(ecoflow, report, d, inverter_sn, inverter_string):
+        return extract_flat(ecoflow, report, d, inverter_sn, inverter_string, prefix)
+
+    return extract
+
+
+# Report -> extractor(ecoflow, report, d, inverter_sn, inverter_string) returning the endpoints.
+# Reports which are empty on sites without the device are skipped before dispatch.
+REPORT_HANDLERS = {
+    "JTS1_LOGY_DEV_REPORT": extract_heat_pump,
+    "JTS1_LOGY_DEV_ENERGY_STREAM_REPORT": _flat("hp_"),
+    "JTS1_HEATING_ROD_PARAM_REPORT": _flat("heatingRod_"),
+    "JTS1_HEATING_ROD_ENERGY_STREAM_REPORT": _flat("heatingRod_"),
+    "JTS1_EVCHARGING_REPORT": _flat("ev_"),
+    "JTS1_EV_CHARGING_ENERGY_STREAM_REPORT": _flat("ev_"),
+    "JTS1_EMS_PV_INV_ENERGY_STREAM_REPORT": extract_pv_inverter,
+}
@@ -0,0 +1,157 @@
+"""exporter.py: Prometheus text and Influx line protocol rendering of the parsed PowerOcean endpoints."""
+
+import re
+import time
+
+
+# Parts of an endpoint name which become labels: inverter role, battery pack, PV string, grid phase
+ROLE_SUFFIX = re.compile(r"_+(master|slave)$")
+PACK = re.compile(r"_bpack(\d+)_")
+STRING = re.compile(r"mpptPv(\d+)(?=_|[A-Z]|$)")
+PHASE = re.compile(r"pcs([ABC])Phase")
+CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+INFLUX_CONTENT_TYPE = "text/plain; charset=utf-8"
+INFLUX_MEASUREMENT = "powerocean"
+
+
+def split_endpoint(endpoint):
+    """Return (metric name, {label: value}) of an endpoint, e.g. bpPwr_bpack2__slave -> bp_pwr, pack 2, slave."""
+    name = endpoint.friendly_name
+    labels = {"serial": endpoint.serial}
+
+    match = ROLE_SUFFIX.search(name)
+    labels["role"] = match.group(1) if match else "system"
+    name = ROLE_SUFFIX.sub("", name)
+
+    match = PACK.search(name + "_")
+    if match:
+        labels["pack"] = match.group(1)
+        name = PACK.sub("_", name + "_").rstrip("_")
+    match = STRING.search(name)
+    if match:
+        labels["string"] = match.group(1)
+        name = STRING.sub("mpptPv", name)
+    match = PHASE.search(name)
+    if match:
+        labels["phase"] = match.group(1)
+        name = PHASE.sub("pcsPhase", name)
+
+    metric = "powerocean_" + re.sub(r"_+", "_", CAMEL.sub("_", name).lower()).strip("_")
+    return metric, labels
+
+
+def _sample_value(value):
+    """Return the numeric value of an endpoint (booleans as 0/1), None for text and dates."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value):
+    return value.replace("\\", "\\\\").replace("\n", " ")
+
+
+def _escape_tag(value):
+    return re.sub(r"([,= ])", r"\\\1", str(value))
+
+
+class MetricsExporter:
+    """The endpoints of one system, rendered once per poll and cached until the next one.
+
+    update() only stores the endpoints of a poll; the first scrape after it renders them in
+    one pass, further scrapes of the same poll return the cached text.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.version = 0  # increased by each update, for caches built on top of the rendering
+        self._endpoints = {}
+        self._stale = frozenset()
+        self._timestamp = None
+        self._names = {}  # unique id -> (metric, labels), the parsing of a name is done once
+        self._families = None  # metric -> (help, [sample lines]), of the current poll
+        self._influx = None
+
+    def update(self, endpoints, stale=(), timestamp=None):
+        """Store the endpoints of a poll; stale endpoints are left out of the export."""
+        self._endpoints = endpoints
+        self._stale = frozenset(stale)
+        self._timestamp = time.time() if timestamp is None else timestamp
+        self._families = None
+        self._influx = None
+        self.version += 1
+
+    def _samples(self):
+        """Yield (metric, labels, value, endpoint) of the numeric, current endpoints."""
+        for unique_id, endpoint in self._endpoints.items():
+            if unique_id in self._stale:
+                continue
+            value = _sample_value(endpoint.value)
+            if value is None:
+                continue
+            names = self._names.get(unique_id)
+            if names is None:
+                metric, labels = split_endpoint(endpoint)
+                labels = {"site": self.site, **labels}
+                names = self._names[unique_id] = (metric, labels)
+            yield names[0], names[1], value, endpoint
+
+    def families(self):
+        """Return {metric: (help, [sample lines])} in the Prometheus text format."""
+        if self._families is None:
+            families = {}
+            for metric, labels, value, endpoint in self._samples():
+                label_text = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+                if metric not in families:
+                    unit = f" ({endpoint.unit})" if endpoint.unit else ""
+                    families[metric] = (f"{endpoint.description or metric}{unit}", [])
+                families[metric][1].append(f"{metric}{{{label_text}}} {value}")
+            if self._timestamp is not None:
+                families["powerocean_last_poll_timestamp_seconds"] = (
+                    "Time of the last poll",
+                    [f'powerocean_last_poll_timestamp_seconds{{site="{_escape_label(self.site)}"}} {self._timestamp:.3f}'],
+                )
+            self._families = families
+        return self._families
+
+    def influx(self):
+        """Return the endpoints in the Influx line protocol, one line per label set."""
+        if self._influx is None:
+            points = {}  # tag text -> [field text]
+            for metric, labels, value, _ in self._samples():
+                tags = ",".join(f"{key}={_escape_tag(value)}" for key, value in sorted(labels.items()))
+                field = metric[len("powerocean_"):]
+                points.setdefault(tags, []).append(f"{field}={float(value)}")  # always float: no field type conflicts
+            timestamp = int((self._timestamp or time.time()) * 1e9)
+            self._influx = "".join(
+                f"{INFLUX_MEASUREMENT},{tags} {','.join(fields)} {timestamp}\n" for tags, fields in points.items()
+            )
+        return self._influx
+
+
+def render_prometheus(exporters):
+    """Return the Prometheus text of several exporters, the series of each metric grouped together."""
+    merged = {}
+    for exporter in exporters:
+        for metric, (help_text, lines) in exporter.families().items():
+            merged.setdefault(metric, (help_text, []))[1].extend(lines)
+
+    out = []
+    for metric, (help_text, lines) in merged.items():
+        out.append(f"# HELP {metric} {_escape_help(help_text)}")
+        out.append(f"# TYPE {metric} gauge")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
+
+
+def render_influx(exporters):
+    """Return the Influx line protocol of several exporters."""
+    return "".join(exporter.influx() for exporter in exporters)
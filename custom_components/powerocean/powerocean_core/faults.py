@@ -0,0 +1,118 @@
+"""faults.py: decoding of PowerOcean fault and warning codes into active-fault sets."""
+
+import re
+
+
+# Warning/fault code keys in JTS1_EMS_CHANGE_REPORT: of the PV strings (e.g. mppt1FaultCode,
+# mppt2WarningCode) and of the AC and DC side of the inverter (pcsAcErrCode, pcsAcWarningCode, pcsDcErrCode)
+EMS_CODE_KEYS = re.compile(r"(mppt\d+|pcsAc|pcsDc)(Fault|Err|Warning)Code$")
+
+# Module lists in JTS1_ERROR_CHANGE_REPORT: report key -> module name.
+# bpErrCode is a list with one entry per battery pack.
+ERROR_CHANGE_MODULES = {
+    "emsErrCode": "ems",
+    "pcsErrCode": "pcs",
+    "bpErrCode": "bp",
+}
+
+# JTS1_ERROR_CODE_MASK_REPORT.errorCode holds 32 words of 32 bits
+MASK_WORD_BITS = 32
+
+# Meaning of the modules, by the name without number (e.g. bp2 -> bp)
+FAULT_MODULES = {
+    "ems": "Energy management",
+    "pcs": "Inverter",
+    "bp": "Battery pack",
+    "mppt": "PV string",
+    "pcsac": "Inverter AC side",
+    "pcsdc": "Inverter DC side",
+    "mask": "Error mask bit",
+}
+
+# Ecoflow publishes no code list for PowerOcean, so there is no table of their meanings:
+# codes are described by their module and number.
+
+# Module name -> (module kind, number)
+_MODULE_NAME = re.compile(r"([a-z]+)(\d*)$")
+
+
+def decode_error_change(report):
+    """Return {module: frozenset of error codes} from JTS1_ERROR_CHANGE_REPORT."""
+    faults = {}
+    for key, module in ERROR_CHANGE_MODULES.items():
+        entries = report.get(key)
+        if isinstance(entries, dict):
+            entries = [entries]
+        elif not isinstance(entries, list):
+            continue
+
+        for i, entry in enumerate(entries):
+            name = module if len(entries) == 1 and module != "bp" else f"{module}{i + 1}"
+            faults[name] = frozenset(entry.get("errCode") or ())
+
+    return faults
+
+
+def decode_error_mask(report):
+    """Return the frozenset of active bits (word * 32 + bit) of JTS1_ERROR_CODE_MASK_REPORT."""
+    active = []
+    for word_index, word in enumerate(report.get("errorCode") or ()):
+        if not word:
+            continue
+        for bit in range(MASK_WORD_BITS):
+            if word >> bit & 1:
+                active.append(word_index * MASK_WORD_BITS + bit)
+
+    return frozenset(active)
+
+
+def decode_ems_codes(report):
+    """Return {mpptN, pcsac, pcsdc: frozenset of "fault N"/"warning N"} from JTS1_EMS_CHANGE_REPORT."""
+    faults = {}
+    for key, value in report.items():
+        match = EMS_CODE_KEYS.match(key)
+        if match is None:
+            continue
+        codes = faults.setdefault(match.group(1).lower(), set())
+        if value:
+            codes.add(f"{'warning' if match.group(2) == 'Warning' else 'fault'} {value}")
+
+    return {module: frozenset(codes) for module, codes in faults.items()}
+
+
+def decode_faults(inverter_data):
+    """Return the active faults of one inverter as {module: frozenset}."""
+    faults = {}
+    faults.update(decode_ems_codes(inverter_data.get("JTS1_EMS_CHANGE_REPORT") or {}))
+    faults.update(decode_error_change(inverter_data.get("JTS1_ERROR_CHANGE_REPORT") or {}))
+    mask = inverter_data.get("JTS1_ERROR_CODE_MASK_REPORT")
+    if mask:
+        faults["mask"] = decode_error_mask(mask)
+
+    return faults
+
+
+def describe_fault(module, code):
+    """Return a readable description of a fault code of a module, e.g. "Battery pack 2: code 17"."""
+    match = _MODULE_NAME.match(module)
+    kind, number = match.groups() if match else (module, "")
+    name = FAULT_MODULES.get(kind, kind) + (f" {number}" if number else "")
+    text = code if isinstance(code, str) else f"code {code}"  # "fault N"/"warning N" of the code keys
+    return f"{name}: {text}"
+
+
+def describe_faults(faults):
+    """Return the sorted descriptions of {module: codes}."""
+    return sorted(describe_fault(module, code) for module, codes in faults.items() for code in codes)
+
+
+def diff_faults(previous, current):
+    """Return [(module, added, removed)] for the modules whose active set changed."""
+    changes = []
+    for module in sorted(set(previous) | set(current)):
+        old = previous.get(module, frozenset())
+        new = current.get(module, frozenset())
+        if old != new:
+            changes.append((module, new - old, old - new))
+
+    return changes
@@ -0,0 +1,86 @@
+"""metrics.py: rolling performance metrics of a PowerOcean config entry (latency, sizes, counts)."""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# Samples kept per metric, i.e. the last METRIC_WINDOW polls
+METRIC_WINDOW = 100
+
+# Metric name -> unit, also the order of the diagnostic sensors
+METRICS = {
+    "http_latency": "ms",
+    "json_decode": "ms",
+    "extraction": "ms",
+    "state_write": "ms",
+    "payload_bytes": "B",
+    "wire_bytes": "B",
+    "sensors_updated": None,
+    "sensors_unchanged": None,
+    "sensors_disabled": None,
+    "sensors_error": None,
+    "failure_streak": None,
+}
+
+
+class RollingHistogram:
+    """The last METRIC_WINDOW samples of one metric."""
+
+    def __init__(self, size=METRIC_WINDOW):
+        self.samples = deque(maxlen=size)
+
+    def add(self, value):
+        """Add a sample."""
+        self.samples.append(value)
+
+    def summary(self):
+        """Return last, min, mean, p50, p95 and max of the window, None if empty."""
+        samples = list(self.samples)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return {
+            "count": len(samples),
+            "last": samples[-1],
+            "min": ordered[0],
+            "mean": round(sum(samples) / len(samples), 2),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+
+
+class Metrics:
+    """Rolling histograms per metric; extraction times are also kept per report."""
+
+    def __init__(self):
+        self.histograms = {}  # name -> RollingHistogram
+
+    def record(self, name, value):
+        """Add a sample to a metric (created on first use)."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram()
+        histogram.add(value)
+
+    @contextmanager
+    def timer(self, name):
+        """Record the duration (ms) of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, round((time.perf_counter() - start) * 1000, 3))
+
+    def last(self, name):
+        """Return the last sample of a metric, None if none recorded."""
+        histogram = self.histograms.get(name)
+        return histogram.samples[-1] if histogram and histogram.samples else None
+
+    def summary(self, name=None):
+        """Return {name: summary} of all metrics, or the summary of one."""
+        if name is not None:
+            histogram = self.histograms.get(name)
+            return histogram.summary() if histogram else None
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
@@ -0,0 +1,50 @@
+"""powerflow.py: power flows between PV, battery, house and grid, for Sankey-style energy cards."""
+
+
+# Flows (W) in the order they are served: PV feeds the house first, then the battery, then the grid;
+# the rest of the house is fed by the battery and then the grid.
+FLOWS = [
+    "pvToHouse",
+    "pvToBattery",
+    "pvToGrid",
+    "batteryToHouse",
+    "batteryToGrid",
+    "gridToHouse",
+    "gridToBattery",
+]
+
+
+def compute_flows(pv, battery, load, grid):
+    """Return {flow: W} from the PV power, battery power (> 0 charging),
+    house load and grid power (> 0 import) of an energy stream report."""
+    pv = max(float(pv), 0.0)
+    load = max(float(load), 0.0)
+    charge, discharge = max(float(battery), 0.0), max(-float(battery), 0.0)
+    grid_import, grid_export = max(float(grid), 0.0), max(-float(grid), 0.0)
+
+    pv_to_house = min(pv, load)
+    pv_to_battery = min(pv - pv_to_house, charge)
+    pv_to_grid = min(pv - pv_to_house - pv_to_battery, grid_export)
+    battery_to_house = min(discharge, load - pv_to_house)
+    battery_to_grid = min(discharge - battery_to_house, grid_export - pv_to_grid)
+    grid_to_house = min(grid_import, load - pv_to_house - battery_to_house)
+    grid_to_battery = min(grid_import - grid_to_house, charge - pv_to_battery)
+
+    values = [
+        pv_to_house,
+        pv_to_battery,
+        pv_to_grid,
+        battery_to_house,
+        battery_to_grid,
+        grid_to_house,
+        grid_to_battery,
+    ]
+    return {flow: round(max(value, 0.0), 1) for flow, value in zip(FLOWS, values)}
+
+
+def flows_from_stream(d):
+    """Return the flows of an energy stream report (mpptPwr, bpPwr, sysLoadPwr, sysGridPwr), None if incomplete."""
+    try:
+        return compute_flows(d["mpptPwr"], d["bpPwr"], d["sysLoadPwr"], d["sysGridPwr"])
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,379 @@
+"""standin.py: local stand-in for the Ecoflow cloud API, replaying recorded detail responses.
+
+    python -m custom_components.powerocean.powerocean_core.standin documentation/*.json --port 8765 --fresh \
+        [--history history.json] [--mqtt-port 1883]
+
+Serves the login, the device detail (the recorded responses in turn, with ETag and gzip),
+the parameter changes (applied to the responses served after them) and optionally a counter history (see backfill.py) and a
+plain MQTT broker (see StandinBroker), for testing the collector, the parser, the streaming
+and the backfill offline.
+"""
+
+import argparse
+import copy
+import gzip
+import hashlib
+import itertools
+import json
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .backfill import HISTORY_PATH
+from .ecoflow import SET_PATH
+
+
+def _to_parallel(response, serial):
+    """Return the response as a two inverter system (slave, master = last key) for serial.
+
+    Recorded single inverter responses keep their reports in data.quota; the parser reads
+    data.parallel.
+    """
+    response = copy.deepcopy(response)
+    data = response["data"]
+    if not data.get("parallel"):
+        quota = data.get("quota") or {}
+        data["parallel"] = {f"{serial}S": copy.deepcopy(quota), serial: quota}
+        data["quota"] = {}
+    return response
+
+
+def _refresh(response):
+    """Stamp the report times (and the timestamps in the battery pack blobs) with the current time."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for inverter in response["data"]["parallel"].values():
+        for report in inverter.values():
+            if isinstance(report, dict) and "updateTime" in report:
+                report["updateTime"] = now
+        packs = inverter.get("JTS1_BP_STA_REPORT", {})
+        for key, value in packs.items():
+            if key and key != "updateTime" and isinstance(value, str):
+                try:
+                    pack = json.loads(value)
+                except ValueError:
+                    continue
+                pack["bpTimestamp"] = int(time.time())
+                packs[key] = json.dumps(pack)
+    return response
+
+
+def _apply_parameters(response, parameters):
+    """Set the changed parameters {serial: {key: value}} in the reports (and pack blobs) which carry them."""
+    for serial, params in parameters.items():
+        inverter = response["data"]["parallel"].get(serial) or {}
+        for report in inverter.values():
+            if not isinstance(report, dict):
+                continue
+            for key, value in list(report.items()):
+                if key in params:
+                    report[key] = params[key]
+                elif isinstance(value, str) and '"bpSn"' in value:
+                    pack = json.loads(value)
+                    if params.keys() & pack.keys():
+                        pack.update((k, v) for k, v in params.items() if k in pack)
+                        report[key] = json.dumps(pack)
+    return response
+
+
+def _success(data=None):
+    return {"code": "0", "message": "Success", "data": data}
+
+
+class StandinServer(ThreadingHTTPServer):
+    """HTTP server replaying the recorded responses round robin."""
+
+    def __init__(self, address, responses, fresh=False, throttle_every=0, history=None, broker=None):
+        super().__init__(address, StandinHandler)
+        self.fresh = fresh
+        self.history = history  # [{"time": epoch seconds, "values": {unique_id: value}}], None: no history
+        self.broker = broker  # (host, port) of the MQTT broker handed out by the certification, None: no broker
+        self.throttle_every = throttle_every  # answer every Nth detail request with HTTP 429
+        self.parameters = {}  # serial -> {key: value} set through SET_PATH
+        self.set_requests = []  # bodies of the requests to SET_PATH, in order
+        self._responses = itertools.cycle(responses)
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def throttled(self):
+        with self._lock:
+            self._requests += 1
+            return bool(self.throttle_every) and self._requests % self.throttle_every == 0
+
+    def history_samples(self, begin, end):
+        return [sample for sample in self.history if begin <= sample["time"] <= end]
+
+    def next_response(self, serial):
+        with self._lock:
+            response = next(self._responses)
+        response = _apply_parameters(_to_parallel(response, serial), self.parameters)
+        return _refresh(response) if self.fresh else response
+
+    def set_parameters(self, body):
+        with self._lock:
+            self.set_requests.append(body)
+            self.parameters.setdefault(body["sn"], {}).update(body["params"])
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    def _send(self, body, status=200, etag=False):
+        """Send a JSON body, gzip compressed if accepted; with etag, answer 304 to a matching If-None-Match."""
+        data = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json"}
+        if etag:
+            headers["ETag"] = '"' + hashlib.sha1(data).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                status, data = 304, b""
+        if data and "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        self._read_body()
+        if urlparse(self.path).path == "/auth/login":
+            self._send(_success({"token": "standin-token", "user": {"userId": "1", "name": "standin"}}))
+        else:
+            self._send({"code": "404", "message": "Not found"}, 404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/provider-service/user/device/detail":
+            serial = parse_qs(url.query).get("sn", ["STANDIN0001"])[0]
+            if self.server.throttled():
+                self._send({"code": "429", "message": "Request too frequent"}, 429)
+            else:
+                self._send(self.server.next_response(serial), etag=True)
+        elif url.path == "/iot-auth/app/certification" and self.server.broker is not None:
+            host, port = self.server.broker
+            self._send(_success({
+                "url": host, "port": str(port), "protocol": "mqtt",
+                "certificateAccount": "standin", "certificatePassword": "standin",
+            }))
+        elif url.path == HISTORY_PATH and self.server.history is not None:
+            query = parse_qs(url.query)
+            begin, end = (int(query.get(key, [default])[0]) for key, default in (("begin", 0), ("end", 2**31)))
+            self._send(_success({"samples": self.server.history_samples(begin, end)}))
+        else:
+            self._send({"code": "404", "message": "Not found"}, 404)
+
+    def do_PUT(self):
+        body = self._read_body()
+        if urlparse(self.path).path == SET_PATH:
+            self.server.set_parameters(json.loads(body))
+            self._send(_success())
+        else:
+            self._send({"code": "404", "message": "Not found"}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _read_packet(rfile):
+    """Read an MQTT control packet, return (packet type, body); None at the end of the stream."""
+    header = rfile.read(1)
+    if not header:
+        return None
+    length, shift = 0, 0
+    while True:
+        byte = rfile.read(1)
+        if not byte:
+            return None
+        length |= (byte[0] & 0x7F) << shift
+        shift += 7
+        if not byte[0] & 0x80:
+            break
+    return header[0], rfile.read(length)
+
+
+def _packet(first, body):
+    length, encoded = len(body), bytearray()
+    while True:
+        byte, length = length & 0x7F, length >> 7
+        encoded.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes([first]) + bytes(encoded) + body
+
+
+def _string(data, offset):
+    (length,) = struct.unpack_from("!H", data, offset)
+    return data[offset + 2:offset + 2 + length].decode(), offset + 2 + length
+
+
+class StandinBroker(socketserver.ThreadingTCPServer):
+    """Minimal MQTT 3.1.1 broker (QoS 0, exact topics) for the streaming mode.
+
+    Clients are accepted with any credentials; publish() sends a message to the subscribers
+    of a topic, e.g. a report update on /app/device/property/{serial}.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, StandinBrokerHandler)
+        self._subscriptions = {}  # handler -> set of topics
+        self._lock = threading.Lock()
+        self.subscribed = threading.Condition(self._lock)
+
+    def publish(self, topic, payload):
+        """Send payload (bytes, str or JSON-able) to the subscribers of topic, return their number."""
+        if not isinstance(payload, (bytes, str)):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        name = topic.encode()
+        packet = _packet(0x30, struct.pack("!H", len(name)) + name + payload)
+        with self._lock:
+            handlers = [handler for handler, topics in self._subscriptions.items() if topic in topics]
+        for handler in handlers:
+            handler.send(packet)
+        return len(handlers)
+
+    def wait_subscribed(self, topic, timeout=10):
+        """Block until a client subscribed to topic, return False on timeout."""
+        with self.subscribed:
+            return self.subscribed.wait_for(
+                lambda: any(topic in topics for topics in self._subscriptions.values()), timeout
+            )
+
+    def subscribe(self, handler, topics):
+        with self.subscribed:
+            self._subscriptions.setdefault(handler, set()).update(topics)
+            self.subscribed.notify_all()
+
+    def remove(self, handler):
+        with self._lock:
+            self._subscriptions.pop(handler, None)
+
+    def drop(self):
+        """Close the connections of all subscribed clients (e.g. a broker restart), return their number."""
+        with self._lock:
+            handlers = list(self._subscriptions)
+            self._subscriptions.clear()
+        for handler in handlers:
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return len(handlers)
+
+
+class StandinBrokerHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self._send_lock = threading.Lock()
+
+    def send(self, packet):
+        with self._send_lock:
+            try:
+                self.wfile.write(packet)
+            except OSError:
+                pass
+
+    def handle(self):
+        try:
+            while (packet := _read_packet(self.rfile)) is not None:
+                first, body = packet
+                kind = first >> 4
+                if kind == 1:  # CONNECT
+                    self.send(_packet(0x20, b"\x00\x00"))
+                elif kind == 3:  # PUBLISH from a client, delivered to the subscribers
+                    topic, offset = _string(body, 0)
+                    if first & 0x06:  # QoS 1/2: packet id, acknowledged as QoS 1
+                        self.send(_packet(0x40, body[offset:offset + 2]))
+                        offset += 2
+                    self.server.publish(topic, body[offset:])
+                elif kind == 8:  # SUBSCRIBE, granted with QoS 0
+                    offset, topics = 2, []
+                    while offset < len(body):
+                        topic, offset = _string(body, offset)
+                        topics.append(topic)
+                        offset += 1
+                    self.server.subscribe(self, topics)
+                    self.send(_packet(0x90, body[:2] + b"\x00" * len(topics)))
+                elif kind == 12:  # PINGREQ
+                    self.send(_packet(0xD0, b""))
+                elif kind == 14:  # DISCONNECT
+                    break
+        except OSError:
+            pass
+        finally:
+            self.server.remove(self)
+
+
+def load_responses(paths):
+    """Return the detail responses among the files; others (invalid JSON, no reports) are skipped with a note."""
+    responses = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as file:
+                response = json.load(file)
+            data = response["data"]
+            if not data.get("parallel") and not data.get("quota"):
+                raise ValueError("no reports in data.parallel or data.quota")
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+            print(f"Skipping {path}, not a detail response: {error}", file=sys.stderr)
+            continue
+        responses.append(response)
+    return responses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded PowerOcean detail responses.")
+    parser.add_argument("files", nargs="+", help="recorded detail responses (JSON)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fresh", action="store_true", help="stamp the reports with the current time")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth detail request with 429")
+    parser.add_argument("--history", help="counter history to serve (JSON list of {time, values})")
+    parser.add_argument("--mqtt-port", type=int, help="also run the MQTT broker of the streaming mode on this port")
+    args = parser.parse_args(argv)
+
+    responses = load_responses(args.files)
+    if not responses:
+        parser.error("none of the files is a detail response")
+
+    history = None
+    if args.history:
+        with open(args.history, encoding="utf-8") as file:
+            history = json.load(file)
+
+    broker = None
+    if args.mqtt_port:
+        broker = StandinBroker((args.host, args.mqtt_port))
+        threading.Thread(target=broker.serve_forever, daemon=True).start()
+        print(f"MQTT broker on mqtt://{args.host}:{args.mqtt_port}", flush=True)
+
+    server = StandinServer(
+        (args.host, args.port), responses, fresh=args.fresh, throttle_every=args.throttle_every, history=history,
+        broker=broker and broker.server_address[:2],
+    )
+    print(f"Serving {len(responses)} responses on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if broker is not None:
+            broker.shutdown()
+            broker.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""writers.py: snapshot writers of the collector (NDJSON, columnar), with size-based file rotation."""
+
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+
+
+# Columnar blocks: magic, uint32 length of the JSON header, then one float64 array per numeric column
+COLUMNAR_MAGIC = b"POC1"
+COLUMNAR_HEADER = struct.Struct("<4sI")
+
+
+class RotatingFile:
+    """Binary file rotated to path.1 ... path.N once it grows beyond max_bytes ("-" is stdout)."""
+
+    def __init__(self, path, max_bytes=0, backups=3):
+        self.path = path
+        self.max_bytes = max_bytes  # 0: never rotate
+        self.backups = backups
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        if self.path == "-":
+            self._file = sys.stdout.buffer
+            self._size = 0
+        else:
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+
+    def _rotate(self):
+        """Close the current file and shift path -> path.1 -> ... -> path.N."""
+        self.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def reserve(self, size):
+        """Rotate if size more bytes would exceed max_bytes; return True if the file is empty."""
+        if self._file is None:
+            self._open()
+        if self.path != "-" and self.max_bytes and self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        return self._size == 0
+
+    def write(self, data):
+        """Write bytes (call reserve first to rotate at a record boundary)."""
+        if self._file is None:
+            self._open()
+        self._file.write(data)
+        self._size += len(data)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None and self._file is not sys.stdout.buffer:
+            self._file.close()
+        self._file = None
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class NdjsonWriter:
+    """One JSON line per snapshot: {"time", "serial", "values": {unique_id: value}, "stale": [...]}.
+
+    Each file starts with a catalog line (name and unit per unique id), so rotated files are self-describing.
+    """
+
+    def __init__(self, file: RotatingFile):
+        self.file = file
+        self._catalog = {}  # serial -> {unique_id: [name, unit]}
+
+    def write(self, timestamp, serial, endpoints, stale=()):
+        catalog = self._catalog.setdefault(serial, {})
+        new = {uid: [e.friendly_name, e.unit] for uid, e in endpoints.items() if uid not in catalog}
+        catalog.update(new)
+        record = self._line(
+            {
+                "time": timestamp,
+                "serial": serial,
+                "values": {uid: _json_value(e.value) for uid, e in endpoints.items()},
+                "stale": sorted(stale),
+            }
+        )
+        if self.file.reserve(len(record)):
+            # new file: repeat the whole catalogs of all serials, so it can be read on its own
+            for known_serial, known_catalog in self._catalog.items():
+                self.file.write(self._line({"type": "catalog", "serial": known_serial, "endpoints": known_catalog}))
+        elif new:
+            self.file.write(self._line({"type": "catalog", "serial": serial, "endpoints": new}))
+        self.file.write(record)
+
+    def _line(self, record):
+        return json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarWriter:
+    """Blocks of up to batch snapshots, stored column by column.
+
+    Numeric values are float64 arrays (NaN when missing), other values are kept in the JSON
+    header of the block. Memory is bounded by the batch size.
+    """
+
+    def __init__(self, file: RotatingFile, batch=60):
+        self.file = file
+        self.batch = batch
+        self._rows = []  # (time, serial, endpoints) of the current block
+
+    def write(self, timestamp, serial, endpoints, stale=()):
+        self._rows.append((timestamp, serial, {uid: e.value for uid, e in endpoints.items()}, sorted(stale)))
+        if len(self._rows) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            self.file.flush()
+            return
+
+        columns = sorted({uid for _, _, values, _ in self._rows for uid in values})
+        numeric, other = [], {}
+        for uid in columns:
+            values = [row[2].get(uid) for row in self._rows]
+            if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+                numeric.append((uid, values))
+            else:
+                other[uid] = [_json_value(v) for v in values]
+
+        header = json.dumps(
+            {
+                "time": [row[0] for row in self._rows],
+                "serial": [row[1] for row in self._rows],
+                "stale": [row[3] for row in self._rows],
+                "numeric": [uid for uid, _ in numeric],
+                "other": other,
+            },
+            separators=(",", ":"),
+            default=str,
+        ).encode()
+        body = b"".join(
+            array("d", (math.nan if v is None else float(v) for v in values)).tobytes() for _, values in numeric
+        )
+        block = COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, len(header)) + header + body
+        self.file.reserve(len(block))
+        self.file.write(block)
+        self.file.flush()
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_columnar(path):
+    """Yield (time, serial, {unique_id: value}) rows of a columnar file."""
+    with open(path, "rb") as file:
+        while True:
+            prefix = file.read(COLUMNAR_HEADER.size)
+            if not prefix:
+                return
+            magic, length = COLUMNAR_HEADER.unpack(prefix)
+            if magic != COLUMNAR_MAGIC:
+                raise ValueError(f"{path}: not a columnar snapshot file")
+            header = json.loads(file.read(length))
+            rows = len(header["time"])
+            columns = {}
+            for uid in header["numeric"]:
+                values = array("d")
+                values.frombytes(file.read(8 * rows))
+                columns[uid] = [None if math.isnan(v) else v for v in values]
+            columns.update(header["other"])
+            for i in range(rows):
+                yield header["time"][i], header["serial"][i], {uid: values[i] for uid, values in columns.items()}
@@ -0,0 +1,30 @@
+"""select.py: Select entities for the settable PowerOcean parameters."""
+
+from homeassistant.components.select import SelectEntity
+
+from .entity import PowerOceanParameterEntity, async_setup_parameter_entities
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    await async_setup_parameter_entities(hass, config_entry, async_add_entities, "select", PowerOceanSelect)
+
+
+class PowerOceanSelect(PowerOceanParameterEntity, SelectEntity):
+    """Representation of a PowerOcean setting with fixed options, e.g. the work mode."""
+
+    @property
+    def options(self):
+        """Return the known options, plus the reported one if it is not known."""
+        options = list(self._parameter["options"])
+        if self._value is not None and self._value not in options:
+            options.append(self._value)
+        return options
+
+    @property
+    def current_option(self):
+        """Return the current (or requested) option."""
+        return self._value
+
+    async def async_select_option(self, option):
+        """Queue the new option."""
+        self._async_set(option)
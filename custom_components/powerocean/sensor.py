@@ -1,13 +1,22 @@
+import asyncio
+import itertools
+import time
+from types import MappingProxyType
 from datetime import timedelta
 from collections import defaultdict
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.components.sensor import SensorStateClass
+from homeassistant.const import UnitOfInformation
+from homeassistant.core import Context, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers import entity_registry
+from homeassistant.helpers import entity_registry, issue_registry
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.exceptions import IntegrationError
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -17,15 +26,30 @@ from .const import (
     ATTR_SOURCE_NAME,
     ATTR_UNIQUE_ID,
     ATTR_PRODUCT_SERIAL,
-    ATTR_PRODUCT_NAME,
-    ATTR_PRODUCT_VENDOR,
-    ATTR_PRODUCT_BUILD,
-    ATTR_PRODUCT_VERSION,
-    ATTR_PRODUCT_FEATURES,
+    ATTR_STALE_SINCE,
+    EVENT_FAULT,
     ISSUE_URL_ERROR_MESSAGE,
+    SIGNAL_UPDATE,
+    ENERGY_STORE_VERSION,
+    ENERGY_SAVE_DELAY,
+    STREAM_RECONCILE_INTERVAL,
+    PROBE_MAX_AGE,
+    RATE_LIMIT_STALE_AFTER,
+    CATALOG_STORE_VERSION,
+    CATALOG_SAVE_DELAY,
+    STATE_WRITE_BATCH,
+    LOW_BANDWIDTH_POLLING,
+    LOW_BANDWIDTH_RECONCILE,
 )
 
-from .ecoflow import Ecoflow, AuthenticationFailed
+from .powerocean_core.accumulator import EnergyAccumulator
+from .powerocean_core.catalog import build_catalog, catalog_hash, endpoints_from_catalog
+from .powerocean_core.faults import describe_faults
+from .powerocean_core.metrics import METRICS
+from .backfill import StatisticsBackfill
+from .ecoflow import Ecoflow, AuthenticationFailed, BudgetExhausted, RateLimited
+from .exporter import async_setup_exporter
+from .streaming import EcoflowStream
 
 
 # Setting up the adding and updating of sensor entities
@@ -34,108 +58,300 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     ecoflow = hass.data[DOMAIN][config_entry.entry_id]
     device_id = ecoflow.device["serial"]
 
-    # Call EcoFlow to get access to the API data
-    try:
-        auth_check = await hass.async_add_executor_job(ecoflow.authorize)
-
-        if not auth_check:
-            # If device returns False or is empty, log an error and return
-            _LOGGER.warning(
-                f"{device_id}: It appears the PowerOcean device is offline or has changed host."
-                + ISSUE_URL_ERROR_MESSAGE
-            )
-
-    except AuthenticationFailed as error:
-        _LOGGER.warning(f"{device_id}: Authentication failed: {error}")
+    # Last parsed data per entry, kept across reloads (e.g. after an options change)
+    snapshots = hass.data[DOMAIN].setdefault("snapshots", {})
+    snapshot = snapshots.get(config_entry.entry_id)
+    fetch_in_background = False
+
+    # Discovered endpoints, persisted for a cold start while the cloud is unreachable
+    catalog_store = Store(hass, CATALOG_STORE_VERSION, f"{DOMAIN}.{config_entry.entry_id}.catalog")
+    catalog = await catalog_store.async_load() or {}
+    catalog_checked = False  # set once the catalog was compared with a fetched dataset
+    catalog_pending = False  # set while a delayed save of the catalog is scheduled
+
+    # The config flow hands over an authenticated instance with its first payload
+    if ecoflow.probe_time is not None and time.monotonic() - ecoflow.probe_time < PROBE_MAX_AGE:
+        _LOGGER.debug(f"{device_id}: Using the login and data of the config flow")
+        data = await hass.async_add_executor_job(ecoflow.load_response, ecoflow._response)
+        if not data:
+            _LOGGER.warning(f"{device_id}: No sensor data in the response of the config flow" + ISSUE_URL_ERROR_MESSAGE)
+    # Create the sensors from the last data without waiting on the cloud, the first fetch runs in the background
+    elif snapshot:
+        _LOGGER.debug(f"{device_id}: Creating the sensors from the last data, fetching in the background")
+        data = dict(snapshot)
+        fetch_in_background = True
+    # Cold start: register the sensors of the catalog as unavailable until the first fetch
+    elif catalog.get("endpoints") and catalog.get("hash") == catalog_hash(catalog["endpoints"]):
+        _LOGGER.debug(f"{device_id}: Creating the sensors from the catalog, fetching in the background")
+        data = endpoints_from_catalog(catalog["endpoints"])
+        ecoflow.stale_endpoints = set(data)
+        fetch_in_background = True
+    else:
+        data = await async_fetch_initial_data(hass, ecoflow, device_id)
+    ecoflow.probe_time = None
+    if not data:
         return
 
-    try:
-        # Fetch the sensor data from the device
-        data = await hass.async_add_executor_job(ecoflow.fetch_data)
+    # Energy counters integrated from the power endpoints, persisted across restarts
+    # (the snapshot already holds the counters of its poll)
+    energy_store = Store(hass, ENERGY_STORE_VERSION, f"{DOMAIN}.{config_entry.entry_id}.energy")
+    accumulator = EnergyAccumulator(await energy_store.async_load())
+    if not fetch_in_background:
+        data.update(accumulator.integrate(data))
+    snapshots[config_entry.entry_id] = data
+    next_energy_save = time.monotonic() + ENERGY_SAVE_DELAY
 
-        if not data:
-            # If data returns False or is empty, log an error and return
-            _LOGGER.warning(
-                f"{device_id}: Failed to fetch sensor data => authentication failed or no data."
-                + ISSUE_URL_ERROR_MESSAGE
-            )
-            return
+    # Write the stores on unload: a delayed save left pending would keep its timer, a
+    # final write listener and this setup's data alive after each reload
+    async def async_write_stores():
+        await energy_store.async_save(accumulator.as_dict())
+        if catalog_pending:
+            await catalog_store.async_save(catalog)
 
-    # Exception if data cannot be fetched
-    except IntegrationError as error:
-        _LOGGER.warning(
-            f"{device_id}: Failed to fetch sensor data: {error}"
-            + ISSUE_URL_ERROR_MESSAGE
-        )
-        return
+    config_entry.async_on_unload(async_write_stores)
 
     # Get device id and then reset the device specific list of sensors for updates
     # to ensure it's empty before adding new entries
 
-    # Initialize or clear the sensor list for this device
-    hass.data[DOMAIN]["device_specific_sensors"][device_id] = []
+    # Initialize or clear the sensor list for this entry (keyed by entry, removed on unload)
+    hass.data[DOMAIN]["device_specific_sensors"][config_entry.entry_id] = []
 
     # Register entities and add them to the list for schedule updates on each device
     # which is stored within hass.data
-    for unique_id, endpoint in data.items():
-        # Get individual sensor entry from API
-        sensor = PowerOceanSensor(ecoflow, endpoint)
+    def async_add_sensors(endpoints):
+        for unique_id, endpoint in endpoints.items():
+            # Get individual sensor entry from API
+            sensor = PowerOceanSensor(ecoflow, endpoint)
+
+            # Add sensors to the device specific list of sensors to be updated, via hass.data as also used in unload
+            hass.data[DOMAIN]["device_specific_sensors"][config_entry.entry_id].append(sensor)
+
+            # Register sensor
+            async_add_entities([sensor], False)
+
+    async_add_sensors(data)
+    catalog_ids = set(data)  # unique ids of the created sensors
+    checked_ids = set()  # unique ids of the dataset the catalog was last compared with
 
-        # Add sensors to the device specific list of sensors to be updated, via hass.data as also used in unload
-        hass.data[DOMAIN]["device_specific_sensors"][device_id].append(sensor)
+    # Opt-in diagnostic sensors for the performance metrics (see metrics.py)
+    if ecoflow.options.get("performance_sensors"):
+        async_add_entities([PowerOceanMetricSensor(ecoflow, config_entry.entry_id, name) for name in METRICS])
 
-        # Register sensor
-        async_add_entities([sensor], False)
+    # Data sent and received over HTTP, for metered connections
+    async_add_entities([PowerOceanDataUsageSensor(ecoflow, config_entry.entry_id)])
 
     device_specific_sensors = hass.data[DOMAIN]["device_specific_sensors"]
     _LOGGER.debug(
-        f"{device_id}: List of device_specific_sensors[device_id]: "
-        f"{device_specific_sensors[device_id]}"
+        f"{device_id}: List of device_specific_sensors[entry_id]: "
+        f"{device_specific_sensors[config_entry.entry_id]}"
     )
 
     # Log the number of sensors registered (and added to the update list)
     _LOGGER.debug(
-        f"{device_id}: All '{len(device_specific_sensors[device_id])}' sensors have registered."
+        f"{device_id}: All '{len(device_specific_sensors[config_entry.entry_id])}' sensors have registered."
     )
 
+    ecoflow.last_success = dt_util.utcnow()
+    signal_update = SIGNAL_UPDATE.format(config_entry.entry_id)
+
+    # Opt-in export of all endpoints at EXPORTER_URL, rendered on the first scrape after a poll
+    exporter = None
+    if ecoflow.options.get("metrics_exporter"):
+        exporter = async_setup_exporter(hass, config_entry, device_id)
+        exporter.update(data, ecoflow.stale_endpoints)
+    fetch_lock = asyncio.Lock()
+
+    # Hourly statistics of the energy counters across outages (and a downtime before this setup)
+    backfill = None
+    if ecoflow.options.get("backfill_statistics", True):
+        backfill = StatisticsBackfill(hass, ecoflow)
+        config_entry.async_on_unload(backfill.async_cancel)
+    backfill_checked = False  # set once the statistics were checked for a downtime
+
+    # Sensors whose state is written by the next flush (insertion ordered, no duplicates)
+    pending_writes = {}
+    flush_context = None
+    flush_scheduled = False
+
+    # Write the queued states in one pass of the event loop, sharing one context per poll,
+    # so master and slave values change together. More than STATE_WRITE_BATCH writes are
+    # spread over the following loop iterations.
+    @callback
+    def async_flush_states():
+        nonlocal flush_scheduled
+        flush_scheduled = False
+        batch = list(itertools.islice(pending_writes, STATE_WRITE_BATCH))
+        with ecoflow.metrics.timer("state_write"):
+            for sensor in batch:
+                del pending_writes[sensor]
+                if sensor.hass is not None:
+                    sensor.async_set_context(flush_context)
+                    sensor.async_write_ha_state()
+        if pending_writes:
+            flush_scheduled = True
+            hass.loop.call_soon(async_flush_states)
+
+    @callback
+    def async_queue_writes(sensors):
+        nonlocal flush_context, flush_scheduled
+        pending_writes.update(dict.fromkeys(sensors))
+        flush_context = Context()
+        if pending_writes and not flush_scheduled:
+            async_flush_states()
+
+    # Mark all sensors as stale (keeping their last good values) or fresh again
+    def async_set_stale(stale):
+        ecoflow.stale_since = ecoflow.last_success if stale else None
+        if stale and exporter is not None:
+            exporter.update({}, timestamp=ecoflow.last_success.timestamp())  # no values rather than old ones
+        async_queue_writes(hass.data[DOMAIN]["device_specific_sensors"].get(config_entry.entry_id, []))
+
+    # Throttled or out of budget: the cloud is up, so no failure for the breaker. While Ecoflow's
+    # backoff runs a repair issue shows it; without data for RATE_LIMIT_STALE_AFTER the sensors go stale
+    rate_limit_issue = f"rate_limited_{config_entry.entry_id}"
+    config_entry.async_on_unload(lambda: issue_registry.async_delete_issue(hass, DOMAIN, rate_limit_issue))
+
+    def async_rate_limited(error, now):
+        if not isinstance(error, BudgetExhausted) or ecoflow.budget.throttled:
+            issue_registry.async_create_issue(
+                hass, DOMAIN, rate_limit_issue, is_fixable=False, severity=issue_registry.IssueSeverity.WARNING,
+                translation_key="rate_limited", translation_placeholders={"name": config_entry.title},
+            )
+        else:
+            _LOGGER.debug(f"{device_id}: Request budget of the account used up, skipping update at {now}")
+        if (
+            ecoflow.stale_since is None
+            and ecoflow.last_success is not None
+            and (dt_util.utcnow() - ecoflow.last_success).total_seconds() > RATE_LIMIT_STALE_AFTER
+        ):
+            _LOGGER.warning(
+                f"{device_id}: No data for {RATE_LIMIT_STALE_AFTER}s, requests of the account are rate limited "
+                f"for another {error.retry_after or 0}s; keeping the last values"
+            )
+            async_set_stale(True)
+        async_dispatcher_send(hass, signal_update)
+
     # Schedule updates
     async def async_update_data(now):
+        nonlocal backfill_checked
         # If device deleted but HASS not restarted, then don't bother continuing
-        if device_id not in hass.data.get(DOMAIN, {}).get(
+        if config_entry.entry_id not in hass.data.get(DOMAIN, {}).get(
             "device_specific_sensors", {}
         ):
             return False
 
+        # Never more than one fetch in flight per entry, and none while the cloud is down
+        if fetch_lock.locked():
+            _LOGGER.debug(f"{device_id}: Previous fetch still running, skipping update at {now}")
+            return
+        if not ecoflow.breaker.allow():
+            async_dispatcher_send(hass, signal_update)
+            return
+
         _LOGGER.debug(f"{device_id}: Preparing to update sensors at {now}")
 
         # Fetch the full dataset once from the API
-        try:
-            full_data = await hass.async_add_executor_job(ecoflow.fetch_data)
+        async with fetch_lock:
+            try:
+                # Log in lazily, e.g. when the sensors were created from the snapshot
+                if ecoflow.token is None:
+                    await hass.async_add_executor_job(ecoflow.authorize)
+                full_data = await hass.async_add_executor_job(ecoflow.fetch_data)
+
+            except Exception as e:
+                if isinstance(e.__cause__, RateLimited):
+                    async_rate_limited(e.__cause__, now)
+                    return
+
+                just_opened = ecoflow.breaker.record_failure()
+                ecoflow.metrics.record("failure_streak", ecoflow.breaker.failures)
+                if just_opened:
+                    _LOGGER.error(
+                        f"{device_id}: Error fetching data from the device, keeping the last values "
+                        f"and retrying in {ecoflow.breaker.retry_in()}s: {e}"
+                        + ISSUE_URL_ERROR_MESSAGE
+                    )
+                    async_set_stale(True)
+                else:
+                    _LOGGER.debug(f"{device_id}: Error fetching data from the device: {e}")
+                async_dispatcher_send(hass, signal_update)
+                return
 
-        except Exception as e:
-            _LOGGER.error(
-                f"{device_id}: Error fetching data from the device: {e}"
-                + ISSUE_URL_ERROR_MESSAGE
-            )
+        if not full_data:
+            _LOGGER.warning(f"{device_id}: No sensor data received from the device")
             return
 
+        ecoflow.last_success = dt_util.utcnow()
+        was_open = ecoflow.breaker.record_success()
+        ecoflow.metrics.record("failure_streak", 0)
+        if backfill is not None and not backfill_checked:
+            backfill_checked = True
+            backfill.async_schedule(full_data)
+        if was_open or ecoflow.stale_since is not None:
+            _LOGGER.info(f"{device_id}: Connection to the Ecoflow cloud restored")
+            if backfill is not None and ecoflow.stale_since is not None:
+                backfill.async_schedule(
+                    full_data, ecoflow.stale_since.timestamp(), snapshots.get(config_entry.entry_id)
+                )
+            async_set_stale(False)
+        issue_registry.async_delete_issue(hass, DOMAIN, rate_limit_issue)
+        ecoflow.commands.async_confirm()
+        async_dispatcher_send(hass, signal_update)
+
+        await async_apply_data(full_data)
+
+    # Apply a parsed dataset to the sensors, from a poll or from the MQTT stream
+    async def async_apply_data(full_data):
+        nonlocal next_energy_save
+
+        # Fire an event for each module whose active faults changed
+        for serial, module, added, removed in ecoflow.pop_fault_changes():
+            hass.bus.async_fire(
+                EVENT_FAULT,
+                {
+                    "serial": serial,
+                    "module": module,
+                    "active": sorted(ecoflow.faults[serial].get(module, ()), key=str),
+                    "added": sorted(added, key=str),
+                    "removed": sorted(removed, key=str),
+                    "descriptions": describe_faults({module: added}),
+                },
+            )
+
+        # Integrate power into the energy counters, batched once per poll
+        full_data.update(accumulator.integrate(full_data))
+        snapshots[config_entry.entry_id] = full_data
+        if exporter is not None:
+            exporter.update(full_data, ecoflow.stale_endpoints)
+
+        # Re-discover when endpoints appear, and compare the catalog once with fetched data
+        if not catalog_checked or full_data.keys() != checked_ids:
+            async_update_catalog(full_data)
+        if time.monotonic() >= next_energy_save:
+            energy_store.async_delay_save(accumulator.as_dict, ENERGY_SAVE_DELAY)
+            next_energy_save = time.monotonic() + ENERGY_SAVE_DELAY
+
         # Fetch the registry and check if sensors are enabled
         registry = entity_registry.async_get(hass)
 
         # Set counters to zero
+        changed = []  # Sensors to write, flushed together after the loop
         counter_updated = 0  # Successfully updated sensors
         counter_disabled = 0  # Disabled sensors, not to be updated
         counter_unchanged = 0  # Skipped sensors since value has not changed
         counter_error = 0  # Skipped sensors due to some error, such as registry not found or no data from API
 
         # Get the list of device specific sensors from hass.data
-        if device_id in hass.data.get(DOMAIN, {}).get("device_specific_sensors", {}):
+        if config_entry.entry_id in hass.data.get(DOMAIN, {}).get("device_specific_sensors", {}):
             device_specific_sensors = hass.data[DOMAIN]["device_specific_sensors"]
 
             # ----------------------------------------------
             # Now loop through the sensors to be updated
             # ----------------------------------------------
-            for sensor in device_specific_sensors[device_id]:
+            for sensor in device_specific_sensors[config_entry.entry_id]:
+                # Sensor just discovered, not yet added to Home Assistant
+                if sensor.hass is None:
+                    continue
                 entity_id = registry.async_get_entity_id(
                     "sensor", DOMAIN, sensor.unique_id
                 )
@@ -151,10 +367,12 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                             # )
 
                             # Check if current state value differs from new API value,
-                            # or current state has not initialized
+                            # or current state has not initialized.
+                            # Values are normalized to their native type in ecoflow.py
                             if (
-                                str(sensor._state).strip()
-                                != str(sensor_data.value).strip()
+                                sensor._state != sensor_data.value
+                                or sensor.endpoint.attributes != sensor_data.attributes
+                                or sensor._attr_available != (sensor.unique_id not in ecoflow.stale_endpoints)
                             ):
                                 # _LOGGER.debug(
                                 #     f"{device_id}: Sensor {sensor.name} marked for update: current state = "
@@ -164,6 +382,8 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                                 # update_status returns 1 for upated, 0 for skipped or error
                                 update_status = await sensor.async_update(sensor_data)
                                 counter_updated = counter_updated + update_status
+                                if update_status:
+                                    changed.append(sensor)
                             else:
                                 # _LOGGER.debug(
                                 #     f"{device_id}: Sensor {sensor.name} skipped update! Current value = "
@@ -188,6 +408,14 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                     )
                     counter_error = counter_error + 1
 
+            # Publish the changed states of this poll together
+            async_queue_writes(changed)
+
+            ecoflow.metrics.record("sensors_updated", counter_updated)
+            ecoflow.metrics.record("sensors_unchanged", counter_unchanged)
+            ecoflow.metrics.record("sensors_disabled", counter_disabled)
+            ecoflow.metrics.record("sensors_error", counter_error)
+
             # Log summary of updates
             _LOGGER.debug(
                 f"{device_id}: A total of {counter_updated} sensors have been updated. "
@@ -202,18 +430,162 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                 f"{device_id}: Sensor must have been deleted, re-start of HA recommended."
             )
 
-    # Get the polling interval from the options, defaulting to 5 seconds if not set
-    polling_interval = timedelta(
-        seconds=config_entry.options.get("polling_interval", 5)
-    )
+    # Add new endpoints as sensors and save the catalog if its schema hash changed.
+    # The first check also drops catalog sensors which the fetched data no longer has.
+    def async_update_catalog(full_data):
+        nonlocal catalog_checked, catalog_pending
+        sensors = hass.data[DOMAIN]["device_specific_sensors"].get(config_entry.entry_id, [])
+        if not catalog_checked:
+            catalog_checked = True
+            for sensor in [sensor for sensor in sensors if sensor.unique_id not in full_data]:
+                _LOGGER.info(f"{device_id}: Sensor {sensor.name} is no longer reported, removed from updates")
+                sensors.remove(sensor)
+                catalog_ids.discard(sensor.unique_id)
+
+        checked_ids.clear()
+        checked_ids.update(full_data)
+        new_endpoints = {uid: endpoint for uid, endpoint in full_data.items() if uid not in catalog_ids}
+        if new_endpoints:
+            _LOGGER.info(f"{device_id}: Discovered {len(new_endpoints)} new sensors")
+            async_add_sensors(new_endpoints)
+            catalog_ids.update(new_endpoints)
+
+        entries = build_catalog({sensor.unique_id: full_data.get(sensor.unique_id, sensor.endpoint) for sensor in sensors})
+        schema_hash = catalog_hash(entries)
+        if schema_hash != catalog.get("hash"):
+            catalog.update({"hash": schema_hash, "inverters": sorted({e["serial"] for e in entries}), "endpoints": entries})
+            catalog_store.async_delay_save(lambda: catalog, CATALOG_SAVE_DELAY)
+            catalog_pending = True
+            _LOGGER.debug(f"{device_id}: Catalog of {len(entries)} sensors saved")
+
+    if not fetch_in_background:
+        async_update_catalog(data)
+
+    polling_interval = timedelta(seconds=polling_seconds(config_entry))
+    reconcile_interval = timedelta(seconds=STREAM_RECONCILE_INTERVAL)
+
+    # Low bandwidth profile: fewer full downloads, the stream (if enabled) carries the changes in between
+    if ecoflow.options.get("low_bandwidth"):
+        polling_interval = max(polling_interval, timedelta(seconds=LOW_BANDWIDTH_POLLING))
+        reconcile_interval = timedelta(seconds=LOW_BANDWIDTH_RECONCILE)
+
+    # Optional MQTT streaming: updates are applied as they arrive, polling only reconciles
+    # while the stream is subscribed and returns to the polling interval when it is lost
+    async def async_start_stream():
+        @callback
+        def async_stream_connection(connected):
+            if not stream.closed:
+                async_schedule_updates(reconcile_interval if connected else polling_interval)
+
+        stream = EcoflowStream(
+            ecoflow,
+            lambda sensors: hass.add_job(async_apply_data, sensors),
+            lambda connected: hass.add_job(async_stream_connection, connected),
+        )
+
+        async def async_stop_stream():
+            stream.closed = True  # no rescheduling by connection changes queued before the unload
+            await hass.async_add_executor_job(stream.disconnect)
+
+        config_entry.async_on_unload(async_stop_stream)
+        try:
+            await hass.async_add_executor_job(stream.connect)
+        except IntegrationError as error:
+            _LOGGER.warning(
+                f"{device_id}: MQTT streaming not available, falling back to polling: {error}"
+            )
+
+    unsub_interval = None
+
+    @callback
+    def async_schedule_updates(interval):
+        nonlocal unsub_interval
+        if unsub_interval is not None:
+            unsub_interval()
+        unsub_interval = async_track_time_interval(hass, async_update_data, interval)
+        # The polls of all systems of the account share its budget, above its rate updates are skipped
+        if ecoflow.budget is not None:
+            demand = ecoflow.budget.set_interval(ecoflow.sn, interval.total_seconds())
+            if demand > ecoflow.budget.rate:
+                _LOGGER.warning(
+                    f"{device_id}: The {ecoflow.budget.sites} systems of this account poll {demand:.2f} requests/s, "
+                    f"more than the {ecoflow.budget.rate}/s Ecoflow allows; updates will be skipped. "
+                    f"Increase the polling intervals or enable streaming"
+                )
+
+    # First fetch (and login) in the background, when the sensors were created from the snapshot or catalog
+    async def async_first_update():
+        await async_update_data(dt_util.utcnow())
+        if ecoflow.options.get("streaming"):
+            if ecoflow.token is None:
+                _LOGGER.warning(f"{device_id}: MQTT streaming not started, not logged in")
+            else:
+                await async_start_stream()
+
+    async_schedule_updates(polling_interval)
+    config_entry.async_on_unload(lambda: unsub_interval())
+    if fetch_in_background:
+        config_entry.async_create_background_task(hass, async_first_update(), f"{DOMAIN}_{device_id}_first_update")
+    elif ecoflow.options.get("streaming"):
+        # connect in the background, polling already runs until the stream is up
+        config_entry.async_create_background_task(hass, async_start_stream(), f"{DOMAIN}_{device_id}_stream")
+
+
+def polling_seconds(config_entry):
+    """Polling time of the entry: set in step 2 of the config flow (data["options"]), else in its options."""
+    polling_time = config_entry.data.get("options", {}).get("polling_time")
+    if polling_time is None:
+        polling_time = config_entry.options.get("polling_time", 10)  # the default of the config flow
+    return polling_time
+
+
+async def async_fetch_initial_data(hass, ecoflow, device_id):
+    """Log in and fetch the data the entities are created from, None on failure."""
+    # Call EcoFlow to get access to the API data
+    try:
+        auth_check = await hass.async_add_executor_job(ecoflow.authorize)
+
+        if not auth_check:
+            # If device returns False or is empty, log an error and return
+            _LOGGER.warning(
+                f"{device_id}: It appears the PowerOcean device is offline or has changed host."
+                + ISSUE_URL_ERROR_MESSAGE
+            )
+
+    except AuthenticationFailed as error:
+        _LOGGER.warning(f"{device_id}: Authentication failed: {error}")
+        return None
+
+    try:
+        # Fetch the sensor data from the device
+        data = await hass.async_add_executor_job(ecoflow.fetch_data)
 
-    async_track_time_interval(hass, async_update_data, polling_interval)
+        if not data:
+            # If data returns False or is empty, log an error and return
+            _LOGGER.warning(
+                f"{device_id}: Failed to fetch sensor data => authentication failed or no data."
+                + ISSUE_URL_ERROR_MESSAGE
+            )
+            return None
+
+    # Exception if data cannot be fetched
+    except IntegrationError as error:
+        _LOGGER.warning(
+            f"{device_id}: Failed to fetch sensor data: {error}"
+            + ISSUE_URL_ERROR_MESSAGE
+        )
+        return None
+
+    return data
 
 
 # This is the actual instance of SensorEntity class
 class PowerOceanSensor(SensorEntity):
     """Representation of a PowerOcean Sensor."""
 
+    # Static attributes are shown, but not stored by the recorder with every state
+    _unrecorded_attributes = frozenset({ATTR_PRODUCT_DESCRIPTION, ATTR_UNIQUE_ID, ATTR_PRODUCT_SERIAL})
+
     def __init__(self, ecoflow: Ecoflow, endpoint):
         """Initialize the sensor."""
         # Make Ecoflow and the endpoint parameters from the Sensor API available
@@ -237,6 +609,7 @@ class PowerOceanSensor(SensorEntity):
 
         # The initial state/value of the sensor
         self._state = endpoint.value
+        self._attr_available = self._unique_id not in ecoflow.stale_endpoints
 
         # The unit of measurement for the sensor
         self._unit = endpoint.unit
@@ -249,6 +622,16 @@ class PowerOceanSensor(SensorEntity):
         if ecoflow.options.get("disable_sensors") and not endpoint.unit:
             self._attr_entity_registry_enabled_default = False
 
+        # Per-entity attributes, computed once; dropped completely if the option is off
+        if ecoflow.options.get("diagnostic_attributes", True):
+            self._static_attributes = MappingProxyType({
+                ATTR_PRODUCT_DESCRIPTION: endpoint.description,
+                ATTR_UNIQUE_ID: endpoint.internal_unique_id,
+                ATTR_PRODUCT_SERIAL: endpoint.serial,
+            })
+        else:
+            self._static_attributes = MappingProxyType({})
+
     @property
     def should_poll(self):
         """async_track_time_intervals handles updates."""
@@ -285,7 +668,7 @@ class PowerOceanSensor(SensorEntity):
             return SensorDeviceClass.ENERGY
         elif self._unit == "W":
             return SensorDeviceClass.POWER
-        elif self._unit == "V":
+        elif self._unit in {"V", "mV"}:
             return SensorDeviceClass.VOLTAGE
         elif self._unit == "A":
             return SensorDeviceClass.CURRENT
@@ -295,7 +678,7 @@ class PowerOceanSensor(SensorEntity):
     @property
     def state_class(self):
         """Return the state class of this entity, if any."""
-        if self._unit in {"°C", "h", "W", "V", "A"}:
+        if self._unit in {"°C", "h", "W", "V", "mV", "A"}:
             return SensorStateClass.MEASUREMENT
         elif self._unit in {"Wh", "kWh"}:
             return SensorStateClass.TOTAL_INCREASING
@@ -305,16 +688,15 @@ class PowerOceanSensor(SensorEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes of this device."""
-        attr = {}
+        # Device facts (vendor, firmware, ...) are in the device registry, the per-entity ones are frozen
+        if not self.endpoint.attributes and self.ecoflow.stale_since is None:
+            return self._static_attributes
 
-        attr[ATTR_PRODUCT_DESCRIPTION] = self.endpoint.description
-        attr[ATTR_UNIQUE_ID] = self.endpoint.internal_unique_id
-        attr[ATTR_PRODUCT_VENDOR] = self.ecoflow.device["vendor"]
-        attr[ATTR_PRODUCT_NAME] = self.ecoflow.device["name"]
-        attr[ATTR_PRODUCT_SERIAL] = self.endpoint.serial
-        attr[ATTR_PRODUCT_VERSION] = self.ecoflow.device["version"]
-        attr[ATTR_PRODUCT_BUILD] = self.ecoflow.device["build"]
-        attr[ATTR_PRODUCT_FEATURES] = self.ecoflow.device["features"]
+        attr = dict(self._static_attributes)
+        if self.endpoint.attributes:
+            attr.update(self.endpoint.attributes)
+        if self.ecoflow.stale_since is not None:
+            attr[ATTR_STALE_SINCE] = self.ecoflow.stale_since
 
         return attr
 
@@ -349,7 +731,7 @@ class PowerOceanSensor(SensorEntity):
         """Call when the sensor is added to Home Assistant."""
         self.async_write_ha_state()
 
-    # Update of Sensor values
+    # Update of Sensor values, the state is written by the batched flush of the poll
     async def async_update(self, sensor_data=None):
         """Update the sensor with the provided data."""
         if sensor_data is None:
@@ -362,8 +744,10 @@ class PowerOceanSensor(SensorEntity):
 
         try:
             self._state = sensor_data.value
+            self.endpoint = sensor_data
+            # sensors from reports whose updateTime/bpTimestamp is too old are unavailable
+            self._attr_available = self.unique_id not in self.ecoflow.stale_endpoints
             update_status = 1
-            self.async_write_ha_state()
 
         except Exception as error:
             _LOGGER.error(
@@ -373,3 +757,68 @@ class PowerOceanSensor(SensorEntity):
             update_status = 0
 
         return update_status
+
+
+class PowerOceanMetricSensor(SensorEntity):
+    """Performance metric of a PowerOcean config entry: last sample, window summary as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, ecoflow: Ecoflow, entry_id, metric):
+        """Initialize the sensor."""
+        self.ecoflow = ecoflow
+        self._entry_id = entry_id
+        self._metric = metric
+        self._attr_unique_id = f"{ecoflow.device['serial']}_metric_{metric}"
+        self._attr_name = f"metric_{metric}"
+        self._attr_native_unit_of_measurement = METRICS[metric]
+        self._attr_icon = "mdi:speedometer"
+
+    @property
+    def native_value(self):
+        """Return the last sample."""
+        return self.ecoflow.metrics.last(self._metric)
+
+    @property
+    def extra_state_attributes(self):
+        """Return min, mean, p50, p95 and max of the window."""
+        return self.ecoflow.metrics.summary(self._metric)
+
+    @property
+    def device_info(self):
+        """Return device specific attributes."""
+        return {
+            "identifiers": {(DOMAIN, self.ecoflow.device["serial"])},
+            "name": self.ecoflow.device["name"],
+            "manufacturer": "ECOFLOW",
+        }
+
+    async def async_added_to_hass(self):
+        """Call when the sensor is added to Home Assistant."""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_UPDATE.format(self._entry_id), self.async_write_ha_state)
+        )
+        self.async_write_ha_state()
+
+
+class PowerOceanDataUsageSensor(PowerOceanMetricSensor):
+    """Data sent and received over HTTP by a config entry since start (estimated, without TLS/TCP overhead)."""
+
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, ecoflow: Ecoflow, entry_id):
+        """Initialize the sensor."""
+        super().__init__(ecoflow, entry_id, "wire_bytes")
+        self._attr_unique_id = f"{ecoflow.device['serial']}_data_usage"
+        self._attr_name = "data_usage"
+        self._attr_native_unit_of_measurement = UnitOfInformation.KILOBYTES
+        self._attr_icon = "mdi:swap-vertical"
+
+    @property
+    def native_value(self):
+        """Return the kB sent and received."""
+        return round(self.ecoflow.data_usage / 1000, 1)
@@ -0,0 +1,117 @@
+"""streaming.py: optional MQTT streaming transport for PowerOcean quota updates."""
+
+import json
+import ssl
+import uuid
+
+from homeassistant.exceptions import IntegrationError
+
+from .const import _LOGGER, ISSUE_URL_ERROR_MESSAGE
+
+
+def _publish_size(message):
+    """Return the bytes of a received PUBLISH packet (header, topic, packet id, payload), with its PUBACK."""
+    remaining = 2 + len(message.topic.encode()) + (2 if message.qos else 0) + len(message.payload)
+    header = 1 + max(1, -(-remaining.bit_length() // 7))  # type byte and variable length of the rest
+    return header + remaining + (4 if message.qos else 0)
+
+
+class EcoflowStream:
+    """Subscribe to the Ecoflow MQTT broker and apply report updates incrementally.
+
+    The broker address and credentials come from Ecoflow.get_mqtt_certification, so a
+    local stand-in broker can be used by pointing url_mqtt_certification at a stand-in API
+    that answers with e.g. {"url": "localhost", "port": "1883", "protocol": "mqtt", ...}.
+    """
+
+    def __init__(self, ecoflow, on_update, on_connection=None):
+        self.ecoflow = ecoflow
+        self.on_update = on_update  # called from the MQTT thread with the updated sensors
+        self.on_connection = on_connection  # called from the MQTT thread with True (subscribed) or False (lost)
+        self.client = None
+        self.connected = False
+        self.closed = False  # set by disconnect, also while connect is still running
+
+    def topics(self):
+        """Function return the topics of all inverters of the system."""
+        serials = [self.ecoflow.sn]
+        response = self.ecoflow._response
+        if response:
+            serials += [sn for sn in response["data"].get("parallel", {}) if sn not in serials]
+        return [f"/app/device/property/{sn}" for sn in serials]
+
+    def connect(self):
+        """Function connect to the broker and start the network loop (blocking, run in executor)."""
+        import paho.mqtt.client as mqtt  # imported on demand, streaming is optional
+
+        cert = self.ecoflow.get_mqtt_certification()
+        client_id = f"ANDROID_{uuid.uuid4()}_{self.ecoflow.user_id}"
+        if hasattr(mqtt, "CallbackAPIVersion"):  # paho-mqtt >= 2.0
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
+        else:
+            client = mqtt.Client(client_id=client_id)
+
+        client.username_pw_set(cert["certificateAccount"], cert["certificatePassword"])
+        if cert.get("protocol", "mqtts") == "mqtts":
+            client.tls_set(cert_reqs=ssl.CERT_REQUIRED)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+
+        try:
+            client.connect(cert["url"], int(cert["port"]), keepalive=30)
+        except OSError as e:
+            error = f"Unable to connect to MQTT broker {cert['url']}:{cert['port']}: {e}"
+            _LOGGER.warning(error + ISSUE_URL_ERROR_MESSAGE)
+            raise IntegrationError(error) from e
+
+        client.loop_start()
+        self.client = client
+        if self.closed:  # unloaded while connecting
+            self.disconnect()
+
+    def disconnect(self):
+        """Function stop the network loop and disconnect."""
+        self.closed = True
+        if self.client is not None:
+            self.client.disconnect()
+            self.client.loop_stop()
+            self.client = None
+        self.connected = False
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            _LOGGER.warning(f"{self.ecoflow.sn}: MQTT connection refused (rc={rc})")
+            return
+
+        self.connected = True
+        for topic in self.topics():
+            client.subscribe(topic)
+        _LOGGER.info(f"{self.ecoflow.sn}: MQTT streaming connected")
+        if self.on_connection is not None:
+            self.on_connection(True)
+
+    def _on_disconnect(self, client, userdata, rc):
+        self.connected = False
+        if self.closed:
+            return
+        _LOGGER.info(f"{self.ecoflow.sn}: MQTT streaming disconnected (rc={rc}), polling continues")
+        if self.on_connection is not None:
+            self.on_connection(False)
+
+    def _on_message(self, client, userdata, message):
+        self.ecoflow.add_data_usage(_publish_size(message))
+        # Only JSON quota messages are applied, others (e.g. protobuf) are left to the
+        # reconciliation poll
+        try:
+            payload = json.loads(message.payload)
+            report = payload["typeCode"]
+            params = payload["params"]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            _LOGGER.debug(f"{self.ecoflow.sn}: ignoring MQTT message on {message.topic}")
+            return
+
+        inverter_sn = message.topic.rsplit("/", 1)[-1]
+        sensors = self.ecoflow.apply_report(inverter_sn, report, params)
+        if sensors:
+            self.on_update(sensors)
@@ -0,0 +1,26 @@
+"""switch.py: Switch entities for the settable PowerOcean parameters."""
+
+from homeassistant.components.switch import SwitchEntity
+
+from .entity import PowerOceanParameterEntity, async_setup_parameter_entities
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    await async_setup_parameter_entities(hass, config_entry, async_add_entities, "switch", PowerOceanSwitch)
+
+
+class PowerOceanSwitch(PowerOceanParameterEntity, SwitchEntity):
+    """Representation of a PowerOcean on/off setting, e.g. energyEfficientEnable."""
+
+    @property
+    def is_on(self):
+        """Return the current (or requested) state."""
+        return None if self._value is None else bool(self._value)
+
+    async def async_turn_on(self, **kwargs):
+        """Queue switching the setting on."""
+        self._async_set(True)
+
+    async def async_turn_off(self, **kwargs):
+        """Queue switching the setting off."""
+        self._async_set(False)
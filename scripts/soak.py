@@ -0,0 +1,331 @@
+"""Soak test: run the integration for simulated hours against a local stand-in API.
+
+    python scripts/soak.py --sites 20 --packs 3 --hours 24 --reload-every 60 --outage-every 180
+
+Runs a test Home Assistant core (pytest-homeassistant-custom-component, matching the
+Home Assistant version) with N sites of master/slave inverters with K battery packs
+each, served with synthetic payloads by a local API. A simulated clock is advanced poll
+by poll; sites are reloaded and the API goes down periodically. Every simulated hour it
+prints event loop lag, tick time, memory and the counts of timers, listeners and tracked
+sensors. Exit code 1 if the counts grow after the first hour, the memory grows by more
+than --max-rss-growth or the loop lag exceeds --max-lag (tests/test_soak.py runs it short).
+"""
+
+import argparse
+import asyncio
+import base64
+import copy
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from aiohttp import web  # noqa: E402
+
+import homeassistant.core  # noqa: E402,F401  (before the loader, which imports it circularly)
+from homeassistant import loader  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_fire_time_changed,
+    async_test_home_assistant,
+)
+
+# Imported before the test core starts: it puts the custom_components package of its testing
+# config on sys.path, which would hide the one of this repository
+import custom_components.powerocean  # noqa: E402,F401
+from custom_components.powerocean import ecoflow as ecoflow_module  # noqa: E402
+from custom_components.powerocean.powerocean_core.budget import RequestBudget  # noqa: E402
+from custom_components.powerocean.powerocean_core.collector import _set_api_url  # noqa: E402
+
+TEMPLATE = ROOT / "documentation" / "response_modified_5_1_16_11.json"
+DOMAIN = "powerocean"
+USERNAME = "soak@example.com"
+
+
+class SimulatedClock:
+    """time.monotonic, time.time and dt_util.utcnow/now running ahead of the real clock by offset.
+
+    The event loop schedules its timers on time.monotonic, so they fall due as the clock is
+    advanced, and the breaker, the request budget, the stale ages and the delayed store
+    writes all see the simulated time.
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+        self._saved = time.monotonic, time.time, dt_util.utcnow, dt_util.now
+
+    def install(self):
+        monotonic, now = time.monotonic, time.time
+        time.monotonic = lambda: monotonic() + self.offset
+        time.time = lambda: now() + self.offset
+        dt_util.utcnow = lambda: datetime.fromtimestamp(time.time(), dt_util.UTC)
+        dt_util.now = lambda time_zone=None: datetime.fromtimestamp(time.time(), time_zone or dt_util.DEFAULT_TIME_ZONE)
+
+    def uninstall(self):
+        time.monotonic, time.time, dt_util.utcnow, dt_util.now = self._saved
+
+    def advance(self, seconds):
+        self.offset += seconds
+
+
+class SyntheticApi:
+    """Stand-in Ecoflow API with synthetic master/slave payloads per site."""
+
+    def __init__(self, sites, packs):
+        with open(TEMPLATE, encoding="utf-8") as file:
+            self.template = json.load(file)
+        self.quota = self.template["data"].pop("quota")
+        self.pack = json.loads(next(v for k, v in self.quota["JTS1_BP_STA_REPORT"].items() if k and k != "updateTime"))
+        self.sites = {f"SOAK{site:04d}": self._site(f"SOAK{site:04d}", packs) for site in range(sites)}
+        self.down = False
+        self.requests = 0
+
+    def _site(self, serial, packs):
+        """Return the parallel section of a site: slave first, master (the config entry serial) last."""
+        parallel = {}
+        for inverter_sn in (f"{serial}S", serial):
+            inverter = copy.deepcopy(self.quota)
+            report = {"updateTime": inverter["JTS1_BP_STA_REPORT"].get("updateTime")}
+            for index in range(packs):
+                pack = dict(self.pack, bpSn=base64.b64encode(f"BP{inverter_sn}{index:02d}".encode()).decode())
+                report[f"{inverter_sn}-BP{index:02d}"] = pack
+            inverter["JTS1_BP_STA_REPORT"] = report
+            parallel[inverter_sn] = inverter
+        return parallel
+
+    def response(self, serial):
+        """Return a detail response with fresh timestamps and changed power values."""
+        now = datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d %H:%M:%S")
+        parallel = {}
+        for inverter_sn, inverter in self.sites[serial].items():
+            inverter = dict(inverter)
+            heartbeat = inverter["JTS1_EMS_HEARTBEAT"] = dict(inverter["JTS1_EMS_HEARTBEAT"], updateTime=now)
+            heartbeat["pcsActPwr"] = round(random.uniform(-3000, 3000), 1)
+            packs = {"updateTime": now}
+            for key, pack in inverter["JTS1_BP_STA_REPORT"].items():
+                if key != "updateTime":
+                    packs[key] = json.dumps(dict(pack, bpTimestamp=int(time.time()), bpPwr=random.uniform(-500, 500)))
+            inverter["JTS1_BP_STA_REPORT"] = packs
+            inverter["JTS1_ENERGY_STREAM_REPORT"] = dict(inverter["JTS1_ENERGY_STREAM_REPORT"], updateTime=now)
+            parallel[inverter_sn] = inverter
+        data = dict(self.template["data"], parallel=parallel, quota={})
+        return dict(self.template, data=data)
+
+    async def login(self, request):
+        return web.json_response({"code": "0", "message": "Success", "data": {"token": "soak", "user": {"userId": "1"}}})
+
+    async def detail(self, request):
+        self.requests += 1
+        if self.down:
+            return web.Response(status=503, text="down")
+        serial = request.query.get("sn")
+        if serial not in self.sites:
+            return web.json_response({"code": "0", "message": "Success", "data": {"parallel": {}, "quota": {}}})
+        return web.json_response(self.response(serial))
+
+    async def async_start(self, port):
+        """Start the API on port (0: a free one), return the port."""
+        app = web.Application()
+        app.router.add_post("/auth/login", self.login)
+        app.router.add_get("/provider-service/user/device/detail", self.detail)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", port).start()
+        return self.runner.addresses[0][1]
+
+
+class LoopLag:
+    """Delay of a 10 ms sleep beyond its 10 ms, sampled continuously (in real time, the loop's clock jumps)."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.samples = []
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            self.samples.append(max(0.0, time.perf_counter() - started - 0.01) * 1000)
+
+    def take(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+    def stop(self):
+        self._task.cancel()
+
+
+def rss_mb():
+    """Return the resident memory of the process in MB (Linux), else the peak."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def counts(hass):
+    """Return the counts which must not grow during the soak."""
+    data = hass.data.get(DOMAIN, {})
+    dispatcher = hass.data.get("dispatcher", {})
+    return {
+        "timers": sum(not handle.cancelled() for handle in hass.loop._scheduled),
+        "listeners": sum(hass.bus.async_listeners().values()),
+        "dispatcher": sum(len(targets) for targets in dispatcher.values()),
+        "tracked": sum(len(sensors) for sensors in data.get("device_specific_sensors", {}).values()),
+        "entities": len(hass.states.async_all()),
+        "tasks": len(asyncio.all_tasks()),
+    }
+
+
+async def soak(args):
+    clock = SimulatedClock()
+    clock.install()
+    try:
+        return await _soak(args, clock)
+    finally:
+        clock.uninstall()
+
+
+async def _soak(args, clock):
+    api = SyntheticApi(args.sites, args.packs)
+    api_url = f"http://127.0.0.1:{await api.async_start(args.port)}"
+
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+
+        # All cloud urls to the stand-in, and a budget which lets all sites poll at --poll
+        init = ecoflow_module.Ecoflow.__init__
+
+        def patched_init(self, *args_, **kwargs):
+            init(self, *args_, **kwargs)
+            _set_api_url(self, api_url)
+
+        ecoflow_module.Ecoflow.__init__ = patched_init
+        hass.data.setdefault(DOMAIN, {})["budgets"] = {USERNAME: RequestBudget(rate=1e6, burst=1e6)}
+
+        entries = []
+        for serial in api.sites:
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                title=serial,
+                version=1.3,
+                data={
+                    "user_input": {"serialnumber": serial, "username": USERNAME, "password": "soak"},
+                    "device_info": {"product": "PowerOcean", "vendor": "Ecoflow", "serial": serial, "name": serial},
+                    # no recorder in the soak, so no statistics to backfill
+                    "options": {
+                        "custom_device_name": serial, "group_sensors": True, "polling_time": args.poll,
+                        "backfill_statistics": False,
+                    },
+                },
+            )
+            entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(entry.entry_id)
+            entries.append(entry)
+        await hass.async_block_till_done()
+
+        lag = LoopLag(hass.loop)
+        ticks_per_hour = 3600 // args.poll
+        baseline = None
+        baseline_rss = None
+        lags = []  # p95 loop lag of the hours after the first
+        rows = []
+        print(f"{args.sites} sites x 2 inverters x {args.packs} packs, {counts(hass)['entities']} entities")
+        print("hour  lag_p95  lag_max  tick_ms  rss_mb  objects  " + "  ".join(counts(hass)))
+
+        for tick in range(args.hours * ticks_per_hour):
+            minute = tick * args.poll // 60
+            first_of_minute = tick * args.poll % 60 < args.poll
+
+            # Outages: the API answers 503 for outage_minutes every outage_every minutes
+            if args.outage_every:
+                api.down = minute % args.outage_every >= args.outage_every - args.outage_minutes
+            # Reloads: one site after the other, every reload_every minutes
+            if args.reload_every and first_of_minute and minute and minute % args.reload_every == 0:
+                entry = entries[(minute // args.reload_every) % len(entries)]
+                await hass.config_entries.async_reload(entry.entry_id)
+
+            started = time.perf_counter()
+            clock.advance(args.poll)
+            async_fire_time_changed(hass, dt_util.utcnow())
+            await hass.async_block_till_done()
+            tick_ms = (time.perf_counter() - started) * 1000
+            rows.append(tick_ms)
+
+            if (tick + 1) % ticks_per_hour == 0:
+                gc.collect()
+                hour = (tick + 1) // ticks_per_hour
+                samples = lag.take() or [0]
+                lag_p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+                rss = rss_mb()
+                current = counts(hass)
+                print(
+                    f"{hour:4d}  {lag_p95:7.1f}"
+                    f"  {max(samples):7.1f}  {statistics.mean(rows):7.1f}  {rss:6.0f}"
+                    f"  {len(gc.get_objects()):7d}  " + "  ".join(f"{value:{len(key)}d}" for key, value in current.items()),
+                    flush=True,
+                )
+                rows = []
+                if hour == 1:
+                    baseline, baseline_rss = current, rss
+                else:
+                    lags.append(lag_p95)
+
+        lag.stop()
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        leftovers = {key: len(value) for key, value in hass.data.get(DOMAIN, {}).items() if hasattr(value, "__len__")}
+        print(f"after unload: {counts(hass)}, hass.data[{DOMAIN}]: {leftovers}")
+        await hass.async_stop(force=True)
+    await api.runner.cleanup()
+
+    failed = False
+    grown = {key: (baseline[key], current[key]) for key in ("timers", "listeners", "dispatcher", "tracked")
+             if baseline and current[key] > baseline[key]}
+    if grown:
+        print(f"Growth after the first hour: {grown}")
+        failed = True
+    if baseline_rss is not None and rss - baseline_rss > args.max_rss_growth:
+        print(f"Memory grew by {rss - baseline_rss:.0f} MB after the first hour (limit {args.max_rss_growth} MB)")
+        failed = True
+    if lags and max(lags) > args.max_lag:
+        print(f"Event loop lag p95 of {max(lags):.1f} ms after the first hour (limit {args.max_lag} ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test of the PowerOcean integration against a stand-in API.")
+    parser.add_argument("--sites", type=int, default=10)
+    parser.add_argument("--inverters", type=int, default=2, help="inverters per site (master and slave)")
+    parser.add_argument("--packs", type=int, default=2, help="battery packs per inverter")
+    parser.add_argument("--hours", type=int, default=6, help="simulated hours")
+    parser.add_argument("--poll", type=int, default=10, help="poll interval (simulated seconds per tick)")
+    parser.add_argument("--reload-every", type=int, default=60, help="minutes between reloads (0: none)")
+    parser.add_argument("--outage-every", type=int, default=120, help="minutes between API outages (0: none)")
+    parser.add_argument("--outage-minutes", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8799, help="port of the local API (0: a free one)")
+    parser.add_argument("--max-rss-growth", type=float, default=50, help="MB the memory may grow after the first hour")
+    parser.add_argument("--max-lag", type=float, default=100, help="ms of event loop lag (p95 of an hour) allowed")
+    args = parser.parse_args()
+    if args.inverters != 2:
+        parser.error("the parser reads master/slave systems, --inverters must be 2")
+    sys.exit(asyncio.run(soak(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Fixtures of the PowerOcean tests: the stand-in cloud (powerocean_core/standin.py) and its MQTT broker."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.powerocean.const import DOMAIN
+from custom_components.powerocean.powerocean_core.budget import RequestBudget
+from custom_components.powerocean.powerocean_core.collector import _set_api_url
+from custom_components.powerocean.powerocean_core.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.standin import StandinBroker, StandinServer, load_responses
+
+DOCUMENTATION = Path(__file__).parent.parent / "documentation"
+SERIAL = "HJ31000001"
+USERNAME = "test@example.com"
+
+
+def recorded_responses():
+    """Return the recorded detail responses of the documentation (parameter_selected.json is skipped)."""
+    return load_responses(sorted(DOCUMENTATION.glob("*.json")))
+
+
+@pytest.fixture
+def broker(socket_enabled):
+    """Return a running stand-in MQTT broker (local sockets are blocked by default in the tests)."""
+    broker = StandinBroker(("127.0.0.1", 0))
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    yield broker
+    broker.shutdown()
+    broker.server_close()
+
+
+@pytest.fixture
+def standin(broker):
+    """Return a running stand-in cloud handing out the stand-in broker."""
+    server = StandinServer(("127.0.0.1", 0), recorded_responses(), fresh=True, broker=broker.server_address[:2])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = "http://127.0.0.1:%d" % server.server_address[1]
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def standin_api(hass, monkeypatch, standin, enable_custom_integrations):
+    """Point the instances created by the integration to the stand-in cloud, with a budget for fast polling."""
+    init = Ecoflow.__init__
+
+    def patched_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        _set_api_url(self, standin.url)
+
+    monkeypatch.setattr(Ecoflow, "__init__", patched_init)
+    hass.data.setdefault(DOMAIN, {})["budgets"] = {USERNAME: RequestBudget(rate=1e6, burst=1e6)}
+    return standin
+
+
+async def async_setup_site(hass, serial=SERIAL, **options):
+    """Add and set up a config entry of serial, return it."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=serial,
+        version=1.3,
+        data={
+            "user_input": {"serialnumber": serial, "username": USERNAME, "password": "test"},
+            "device_info": {"product": "PowerOcean", "vendor": "Ecoflow", "serial": serial, "name": serial},
+            "options": {
+                "custom_device_name": serial, "group_sensors": True, "polling_time": 5, "backfill_statistics": False,
+                **options,
+            },
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,129 @@
+"""Tests of the backfill of the hourly statistics (powerocean_core/backfill.py, backfill.py)."""
+
+import math
+import time
+from zoneinfo import ZoneInfo
+
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import async_import_statistics, statistics_during_period
+from homeassistant.helpers import entity_registry
+from homeassistant.util import dt as dt_util
+
+from custom_components.powerocean.backfill import StatisticsBackfill, _statistics_bases
+from custom_components.powerocean.const import DOMAIN
+from custom_components.powerocean.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.backfill import HOUR, hourly_values
+from custom_components.powerocean.powerocean_core.collector import _set_api_url
+from custom_components.powerocean.powerocean_core.standin import _to_parallel
+
+from .conftest import SERIAL, recorded_responses
+
+COUNTER = f"{SERIAL}_totalElectricityGeneration"
+H0 = 1_700_000_000 // HOUR * HOUR  # start of an hour, 2023-11-14 22:00 UTC
+
+
+def test_hourly_values_interpolated():
+    assert hourly_values(H0 + 1800, 10, H0 + 3 * HOUR + 1800, 40) == [
+        (H0, 15), (H0 + HOUR, 25), (H0 + 2 * HOUR, 35),  # the hour in which the gap ends is left out
+    ]
+    assert hourly_values(H0 + 1800, 10, H0 + 3000, 20) == []  # no full hour
+    assert hourly_values(H0, "unknown", H0 + 2 * HOUR, 20) == []
+
+
+def test_hourly_values_through_samples():
+    samples = [(H0 + 5400, 30), (H0 - HOUR, 0), (H0 + 7200, "unavailable")]  # outside the gap, invalid: ignored
+    assert hourly_values(H0 + 1800, 10, H0 + 3 * HOUR + 1800, 40, samples) == [
+        (H0, 20), (H0 + HOUR, 32.5), (H0 + 2 * HOUR, 37.5),
+    ]
+
+
+def test_hourly_values_decrease():
+    assert hourly_values(H0, 20, H0 + 3 * HOUR, 10) == []
+    assert hourly_values(H0, 10, H0 + 3 * HOUR, 40, [(H0 + HOUR, 30), (H0 + 2 * HOUR, 25)]) == []
+
+
+def test_hourly_values_period_restart():
+    # 22:30 to 01:30 UTC: the day restarts during the gap
+    assert hourly_values(H0 + 1800, 5, H0 + 3 * HOUR + 1800, 8, period="day", tz=ZoneInfo("UTC")) == []
+    assert hourly_values(H0 + 1800, 5, H0 + 3 * HOUR + 1800, 8, period="year", tz=ZoneInfo("UTC"))
+    # 22:30 to 23:30 UTC is the same day in UTC, in Berlin (UTC+1) the day restarts in between
+    assert hourly_values(H0 + 1800, 5, H0 + 5400, 8, period="day", tz=ZoneInfo("UTC"))
+    assert hourly_values(H0 + 1800, 5, H0 + 5400, 8, period="day", tz=ZoneInfo("Europe/Berlin")) == []
+
+
+def test_timezone_of_the_site():
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    response = _to_parallel(recorded_responses()[0], SERIAL)
+    response["data"]["timezone"] = "Europe/Berlin"
+    ecoflow.load_response(response)
+    assert ecoflow.timezone == ZoneInfo("Europe/Berlin")
+
+
+def _endpoints(value):
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    sensors = ecoflow.load_response(_to_parallel(recorded_responses()[0], SERIAL))
+    return {COUNTER: sensors[COUNTER]._replace(value=value)}
+
+
+async def _async_counter_statistics(hass, rows):
+    """Register the counter's entity and import its hourly rows [(start, state, sum)], return the entity_id."""
+    entity_id = entity_registry.async_get(hass).async_get_or_create("sensor", DOMAIN, COUNTER).entity_id
+    metadata = {
+        "has_mean": False, "has_sum": True, "name": None, "source": "recorder",
+        "statistic_id": entity_id, "unit_of_measurement": "kWh",
+    }
+    async_import_statistics(hass, metadata, [
+        {"start": dt_util.utc_from_timestamp(start), "state": state, "sum": total} for start, state, total in rows
+    ])
+    await async_wait_recording_done(hass)
+    return entity_id
+
+
+async def _async_bases(hass, entity_id, start, before):
+    return await get_instance(hass).async_add_executor_job(
+        _statistics_bases, hass, {entity_id: COUNTER}, start, before
+    )
+
+
+async def test_statistics_bases_after_downtime(recorder_mock, hass):
+    entity_id = await _async_counter_statistics(hass, [(H0, 100, 10), (H0 + HOUR, 102, 12)])
+    assert await _async_bases(hass, entity_id, None, None) == {entity_id: (H0 + 2 * HOUR, 102, 12)}
+
+
+async def test_statistics_bases_after_outage(recorder_mock, hass):
+    entity_id = await _async_counter_statistics(hass, [(H0, 100, 10), (H0 + HOUR, 102, 12)])
+    start = H0 + HOUR + 1200  # the row of this hour still shows the value before the gap
+
+    assert await _async_bases(hass, entity_id, start, _endpoints(102)) == {entity_id: (start, 102, 12)}
+    assert await _async_bases(hass, entity_id, start, _endpoints(101)) == {}  # e.g. kept updated by the stream
+    assert await _async_bases(hass, entity_id, start, _endpoints("unavailable")) == {}
+    assert await _async_bases(hass, entity_id, start, {}) == {}
+
+
+async def test_backfill_through_the_history(recorder_mock, hass, standin):
+    now = time.time()
+    hour = math.floor(now / HOUR) * HOUR - 6 * HOUR
+    start, end = hour + 1800, hour + 4 * HOUR + 1800
+    standin.history = [
+        {"time": hour + 2 * HOUR + 1800, "values": {COUNTER: 112}},
+        {"time": hour - HOUR, "values": {COUNTER: 50}},  # before the gap, not requested
+    ]
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    _set_api_url(ecoflow, standin.url)
+    await hass.async_add_executor_job(ecoflow.authorize)
+    entity_id = await _async_counter_statistics(hass, [(hour - HOUR, 98, 8), (hour, 100, 10)])
+
+    backfill = StatisticsBackfill(hass, ecoflow)
+    assert await backfill.async_backfill(_endpoints(116), end, start, _endpoints(100)) == 4
+    await async_wait_recording_done(hass)
+
+    rows = await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, dt_util.utc_from_timestamp(hour), None, {entity_id}, "hour", None,
+        {"state", "sum"},
+    )
+    # 100 at 0:30, 112 at 2:30 (history), 116 at 4:30; the sums continue the row before the gap
+    assert [(row["start"], row["state"], row["sum"]) for row in rows[entity_id]] == [
+        (hour, 103, 13), (hour + HOUR, 109, 19), (hour + 2 * HOUR, 113, 23), (hour + 3 * HOUR, 115, 25),
+    ]
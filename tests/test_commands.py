@@ -0,0 +1,73 @@
+"""Tests of the command queue of the settable parameters against the stand-in cloud."""
+
+import asyncio
+import logging
+
+import pytest
+
+from custom_components.powerocean import commands
+from custom_components.powerocean.commands import CommandQueue
+from custom_components.powerocean.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.collector import _set_api_url
+
+from .conftest import SERIAL
+
+SLAVE = f"{SERIAL}S"
+
+
+@pytest.fixture
+async def ecoflow(hass, standin):
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    _set_api_url(ecoflow, standin.url)
+    await hass.async_add_executor_job(ecoflow.authorize)
+    await hass.async_add_executor_job(ecoflow.fetch_data)
+    return ecoflow
+
+
+@pytest.fixture(autouse=True)
+def short_delay(monkeypatch):
+    monkeypatch.setattr(commands, "COMMAND_DELAY", 0.05)
+
+
+async def test_parameters_parsed_per_inverter(hass, ecoflow):
+    CommandQueue(hass, ecoflow)
+    for inverter_sn in (SERIAL, SLAVE):
+        assert ecoflow.get_parameter("emsCtrlLedBright", inverter_sn) is not None
+        assert ecoflow.get_parameter("bpUpLimitSoc", inverter_sn) is not None
+    assert ecoflow.get_parameter("emsCtrlLedBright") == ecoflow.get_parameter("emsCtrlLedBright", SERIAL)
+
+
+async def test_changes_coalesced_and_confirmed(hass, ecoflow, standin):
+    queue = CommandQueue(hass, ecoflow)
+    for value in (10, 20, 30):  # slider drag
+        queue.async_set("emsCtrlLedBright", value, SERIAL)
+    queue.async_set("bpUpLimitSoc", 90, SLAVE)
+    assert queue.value("emsCtrlLedBright", SERIAL) == 30
+
+    await asyncio.sleep(0.2)
+    await hass.async_block_till_done()
+    assert sorted(standin.set_requests, key=lambda body: body["sn"]) == [
+        {"sn": SERIAL, "params": {"emsCtrlLedBright": 30}},
+        {"sn": SLAVE, "params": {"bpUpLimitSoc": 90}},
+    ]
+
+    # the next fetched report confirms the values
+    await hass.async_add_executor_job(ecoflow.fetch_data)
+    queue.async_confirm()
+    assert queue._optimistic == {}
+    assert queue.value("emsCtrlLedBright", SERIAL) == 30
+    assert queue.value("bpUpLimitSoc", SLAVE) == 90
+
+
+async def test_cancel_logs_dropped_changes(hass, ecoflow, standin, caplog):
+    queue = CommandQueue(hass, ecoflow)
+    queue.async_set("emsCtrlLedBright", 40, SERIAL)
+    with caplog.at_level(logging.WARNING):
+        queue.async_cancel()
+    await asyncio.sleep(0.1)
+    assert "emsCtrlLedBright" in caplog.text
+    assert standin.set_requests == []
+
+
+async def test_no_set_endpoint_for_the_cloud():
+    assert Ecoflow(SERIAL, "test", "test").url_user_set is None
@@ -0,0 +1,60 @@
+"""Tests of the config flow against the stand-in cloud."""
+
+import pytest
+
+from custom_components.powerocean import config_flow
+from custom_components.powerocean.const import DOMAIN, PROBE_MAX_AGE
+from custom_components.powerocean.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.collector import _set_api_url
+
+from .conftest import SERIAL
+
+USER_INPUT = {"serialnumber": SERIAL, "username": "test", "password": "test"}
+
+
+@pytest.fixture(autouse=True)
+def standin_ecoflow(monkeypatch, standin, enable_custom_integrations):
+    def ecoflow(*args):
+        ecoflow = Ecoflow(*args)
+        _set_api_url(ecoflow, standin.url)
+        return ecoflow
+
+    monkeypatch.setattr(config_flow, "Ecoflow", ecoflow)
+
+
+async def _probed_flow(hass, user_input=USER_INPUT):
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+    assert result["step_id"] == "device_options"
+    return result
+
+
+async def test_probe_dropped_on_abort(hass):
+    result = await _probed_flow(hass)
+    assert SERIAL in hass.data[DOMAIN]["probes"]
+
+    hass.config_entries.flow.async_abort(result["flow_id"])
+    assert hass.data[DOMAIN]["probes"] == {}
+
+
+async def test_probe_of_open_flow_expires(hass):
+    await _probed_flow(hass)
+    hass.data[DOMAIN]["probes"][SERIAL].probe_time -= PROBE_MAX_AGE
+
+    other = dict(USER_INPUT, serialnumber="HJ31000002")
+    await _probed_flow(hass, other)
+    assert list(hass.data[DOMAIN]["probes"]) == ["HJ31000002"]
+
+
+async def test_probe_taken_over_by_setup(hass):
+    result = await _probed_flow(hass)
+    probe = hass.data[DOMAIN]["probes"][SERIAL]
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"custom_device_name": "PowerOcean", "polling_time": 10, "backfill_statistics": False}
+    )
+    assert result["type"] == "create_entry"
+    assert hass.data[DOMAIN]["probes"] == {}
+    assert hass.data[DOMAIN][result["result"].entry_id] is probe
+
+    assert await hass.config_entries.async_unload(result["result"].entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,44 @@
+"""Tests of the import behaviour of the core library (powerocean_core)."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def _run(code, cwd):
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, timeout=60)
+
+
+def test_integration_import_does_not_load_the_client():
+    result = _run(
+        "import sys, custom_components.powerocean.const\n"
+        "print(sorted(m for m in sys.modules if m.startswith('custom_components.powerocean.')))",
+        ROOT,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "powerocean_core.ecoflow" not in result.stdout
+    assert "requests" not in result.stdout
+
+
+def test_exports_load_on_access():
+    core = "custom_components.powerocean.powerocean_core"
+    result = _run(
+        f"import sys, {core} as core\n"
+        f"assert '{core}.ecoflow' not in sys.modules\n"
+        "from custom_components.powerocean.powerocean_core import Ecoflow, RequestBudget\n"
+        "assert core.__all__ == sorted(core._EXPORTS)\n"
+        "print(Ecoflow.__module__, RequestBudget.__module__)",
+        ROOT,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == [f"{core}.ecoflow", f"{core}.budget"]
+
+
+def test_run_from_the_repository_root():
+    result = subprocess.run(
+        [sys.executable, "-m", "custom_components.powerocean.powerocean_core.standin", "--help"],
+        cwd=ROOT, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
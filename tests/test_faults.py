@@ -0,0 +1,36 @@
+"""Tests of the fault decoding (powerocean_core/faults.py) and the fault changes of the parser."""
+
+from custom_components.powerocean.powerocean_core.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.faults import describe_fault, describe_faults
+from custom_components.powerocean.powerocean_core.standin import _to_parallel
+
+from .conftest import SERIAL, recorded_responses
+
+
+def test_describe_fault():
+    assert describe_fault("bp2", 17) == "Battery pack 2: code 17"
+    assert describe_fault("mppt1", "warning 3") == "PV string 1: warning 3"
+    assert describe_fault("pcsac", "fault 4") == "Inverter AC side: fault 4"
+    assert describe_fault("inv", 5) == "inv: code 5"
+    assert describe_faults({"pcs": frozenset({4, 2})}) == ["Inverter: code 2", "Inverter: code 4"]
+
+
+def test_fault_changes_kept_until_taken():
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    response = _to_parallel(recorded_responses()[0], SERIAL)
+    ecoflow.load_response(response)
+    ecoflow.pop_fault_changes()
+
+    # a poll and an MQTT update before the sensors take the changes
+    report = response["data"]["parallel"][SERIAL]["JTS1_EMS_CHANGE_REPORT"]
+    report["mppt1FaultCode"] = 7
+    report["updateTime"] = "2030-01-01 00:00:00"
+    ecoflow.load_response(response)
+    ecoflow.apply_report(SERIAL, "JTS1_EMS_CHANGE_REPORT", {"mppt2WarningCode": 3, "pcsAcErrCode": 4, "pcsDcErrCode": 0})
+
+    changes = {(serial, module): added for serial, module, added, removed in ecoflow.pop_fault_changes()}
+    assert changes[(SERIAL, "mppt1")] == {"fault 7"}
+    assert changes[(SERIAL, "mppt2")] == {"warning 3"}
+    assert changes[(SERIAL, "pcsac")] == {"fault 4"}
+    assert (SERIAL, "pcsdc") not in changes  # no code, no change
+    assert ecoflow.pop_fault_changes() == []
@@ -0,0 +1,60 @@
+"""Tests of the parser of the detail response (powerocean_core/ecoflow.py)."""
+
+from custom_components.powerocean.powerocean_core.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.standin import _to_parallel
+
+from .conftest import SERIAL, recorded_responses
+
+
+def _parsed():
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    response = _to_parallel(recorded_responses()[0], SERIAL)
+    return ecoflow, response, ecoflow.load_response(response)
+
+
+def test_unchanged_reports_reused():
+    ecoflow, response, sensors = _parsed()
+    assert (SERIAL, "JTS1_EMS_CHANGE_REPORT") in ecoflow.changed_reports
+
+    assert ecoflow.load_response(response) == sensors
+    assert ecoflow.changed_reports == set()
+
+
+def test_report_extracted_when_update_time_moves():
+    ecoflow, response, sensors = _parsed()
+    report = response["data"]["parallel"][SERIAL]["JTS1_EMS_CHANGE_REPORT"]
+    report["bpSoc"] = 12
+    report["updateTime"] = "2030-01-01 00:00:00"
+
+    sensors = ecoflow.load_response(response)
+    assert ecoflow.changed_reports == {(SERIAL, "JTS1_EMS_CHANGE_REPORT")}
+    assert sensors[f"{SERIAL}_JTS1_EMS_CHANGE_REPORT_bpSoc_master"].value == 12
+
+
+def test_pack_serials_follow_the_blob():
+    ecoflow, response, sensors = _parsed()
+    packs = response["data"]["parallel"][SERIAL]["JTS1_BP_STA_REPORT"]
+    first, second = (key for key in packs if key and key != "updateTime")
+    assert ecoflow._pack_serials[(SERIAL, first)] != ecoflow._pack_serials[(SERIAL, second)]
+
+    # the packs swap their keys: the cached serials must not be reused
+    packs[first], packs[second] = packs[second], packs[first]
+    del packs[second]
+    index = ecoflow._get_pack_index(SERIAL, packs)
+    assert ecoflow._pack_serials[(SERIAL, first)] == ecoflow._pack_serials[(f"{SERIAL}S", second)]
+    assert (SERIAL, second) not in ecoflow._pack_serials
+    assert index == {first: 2}
+
+
+def test_invalid_timezone_looked_up_once(monkeypatch):
+    ecoflow, response, sensors = _parsed()
+    lookups = []
+
+    def zone_info(name):
+        lookups.append(name)
+        raise ValueError(name)
+
+    monkeypatch.setattr("custom_components.powerocean.powerocean_core.ecoflow.ZoneInfo", zone_info)
+    for _ in range(3):
+        assert ecoflow._get_timezone("Mars/Olympus") is None
+    assert lookups == ["Mars/Olympus"]
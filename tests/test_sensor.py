@@ -0,0 +1,152 @@
+"""Tests of the sensor platform against the stand-in cloud."""
+
+import asyncio
+import itertools
+import logging
+from datetime import timedelta
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.helpers import issue_registry
+from homeassistant.util import dt as dt_util
+
+from custom_components.powerocean import sensor
+from custom_components.powerocean.const import DOMAIN
+from custom_components.powerocean.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.budget import RequestBudget
+
+from .conftest import SERIAL, USERNAME, async_setup_site, recorded_responses
+
+
+async def _poll(hass, times=1):
+    for _ in range(times):
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+
+async def _wait_for(condition, timeout=30):
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return True
+        await asyncio.sleep(0.05)
+    return condition()
+
+
+async def test_catalog_rebuilt_only_when_the_endpoints_change(hass, standin_api, monkeypatch):
+    response = recorded_responses()[0]
+    standin_api._responses = itertools.repeat(response)
+    standin_api.fresh = False
+    builds = []
+    build_catalog = sensor.build_catalog
+    monkeypatch.setattr(sensor, "build_catalog", lambda endpoints: builds.append(1) or build_catalog(endpoints))
+
+    entry = await async_setup_site(hass)
+    await _poll(hass)
+    assert builds
+
+    # a value is no longer reported: one rebuild, not one per poll
+    report = response["data"]["quota"]["JTS1_EMS_CHANGE_REPORT"]
+    del report["bpOnlineSum"]
+    report["updateTime"] = "2030-01-01 00:00:00"
+    builds.clear()
+    await _poll(hass, 5)
+    assert len(builds) == 1
+
+    # the kept-alive connection is closed on unload
+    ecoflow = hass.data[DOMAIN][entry.entry_id]
+    assert ecoflow._http is not None
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert ecoflow._http is None
+
+
+async def test_rate_limiting_shown(hass, standin_api):
+    entry = await async_setup_site(hass)
+    ecoflow = hass.data[DOMAIN][entry.entry_id]
+    issue_id = f"rate_limited_{entry.entry_id}"
+
+    # throttled: a repair issue, the sensors go stale once the data is old
+    standin_api.throttle_every = 1
+    await _poll(hass)
+    assert issue_registry.async_get(hass).async_get_issue(DOMAIN, issue_id) is not None
+    assert ecoflow.stale_since is None
+    ecoflow.last_success -= timedelta(seconds=sensor.RATE_LIMIT_STALE_AFTER + 1)
+    await _poll(hass)  # still backing off
+    assert ecoflow.stale_since is not None
+    assert ecoflow.breaker.failures == 0
+
+    # accepted again: fresh and no issue
+    standin_api.throttle_every = 0
+    ecoflow.budget.backoff_until = None
+    await _poll(hass)
+    assert ecoflow.stale_since is None
+    assert issue_registry.async_get(hass).async_get_issue(DOMAIN, issue_id) is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_warning_when_polls_exceed_the_budget(hass, standin_api, caplog):
+    hass.data[DOMAIN]["budgets"] = {USERNAME: RequestBudget(rate=0.1, burst=1e6)}
+    entry = await async_setup_site(hass)
+    assert "poll 0.20 requests/s, more than the 0.1/s" in caplog.text
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert hass.data[DOMAIN]["budgets"][USERNAME].demand == 0
+
+
+async def test_polling_follows_the_stream(hass, standin_api, broker, monkeypatch):
+    budget = hass.data[DOMAIN]["budgets"][USERNAME]
+    intervals = []
+    set_interval = budget.set_interval
+    monkeypatch.setattr(budget, "set_interval", lambda site, seconds: intervals.append(seconds) or set_interval(site, seconds))
+    entry = await async_setup_site(hass, streaming=True, polling_time=15)
+    polling, reconcile = intervals[0], sensor.STREAM_RECONCILE_INTERVAL
+    assert polling == 15  # the polling time of the config flow
+
+    # only reconciliation polls while subscribed, the polling interval while the stream is lost
+    assert await _wait_for(lambda: intervals == [polling, reconcile])
+    broker.drop()
+    assert await _wait_for(lambda: intervals == [polling, reconcile, polling, reconcile])
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert intervals == [polling, reconcile, polling, reconcile]
+
+
+async def test_outage_logged_once(hass, standin_api, caplog):
+    entry = await async_setup_site(hass)
+    ecoflow = hass.data[DOMAIN][entry.entry_id]
+    ecoflow.url_user_fetch = "http://127.0.0.1:1/provider-service/user/device/detail"  # refused
+    caplog.clear()
+
+    await _poll(hass, 4)  # the breaker opens after 3 failures
+    ecoflow.breaker.retry_at = 0  # a failed trial request
+    await _poll(hass)
+    assert ecoflow.breaker.failures == 4
+    warnings = [
+        record.getMessage() for record in caplog.records
+        if record.name.startswith("custom_components.powerocean") and record.levelno >= logging.WARNING
+    ]
+    assert len(warnings) == 1
+    assert "keeping the last values and retrying in" in warnings[0]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_settings_only_with_a_set_endpoint(hass, standin_api, monkeypatch):
+    entry = await async_setup_site(hass)
+    await _poll(hass)
+    assert hass.states.async_entity_ids("number")
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    init = Ecoflow.__init__
+
+    def init_without_set_endpoint(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.url_user_set = None  # as against the Ecoflow cloud
+
+    monkeypatch.setattr(Ecoflow, "__init__", init_without_set_endpoint)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.async_entity_ids("sensor")
+    assert not [entity_id for entity_id in hass.states.async_entity_ids("number")
+                if hass.states.get(entity_id).state != "unavailable"]
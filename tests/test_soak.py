@@ -0,0 +1,21 @@
+"""Short run of the soak test (scripts/soak.py): no growth of timers, listeners and memory, no loop lag."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+SOAK = Path(__file__).parent.parent / "scripts" / "soak.py"
+
+
+def test_soak():
+    # three simulated hours with hourly outages and a reload every 30 minutes
+    result = subprocess.run(
+        [
+            sys.executable, str(SOAK), "--sites", "2", "--packs", "1", "--hours", "3", "--poll", "60",
+            "--reload-every", "30", "--outage-every", "60", "--outage-minutes", "10", "--port", "0",
+        ],
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    hours = [line.split()[0] for line in result.stdout.splitlines() if line.startswith(" ")]
+    assert hours == ["1", "2", "3"]
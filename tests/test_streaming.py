@@ -0,0 +1,77 @@
+"""Tests of the MQTT streaming against the stand-in cloud and broker."""
+
+import queue
+
+from custom_components.powerocean.ecoflow import Ecoflow
+from custom_components.powerocean.powerocean_core.collector import _set_api_url
+from custom_components.powerocean.streaming import EcoflowStream
+
+from .conftest import SERIAL
+
+REPORT = "JTS1_EMS_CHANGE_REPORT"
+
+
+def _connected_stream(standin, broker):
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    _set_api_url(ecoflow, standin.url)
+    ecoflow.authorize()
+    ecoflow.fetch_data()
+
+    updates = queue.Queue()
+    stream = EcoflowStream(ecoflow, updates.put, updates.put)  # connection changes as True/False
+    stream.connect()
+    assert broker.wait_subscribed(f"/app/device/property/{SERIAL}")
+    assert updates.get(timeout=10) is True
+    return ecoflow, stream, updates
+
+
+def test_report_update_applied(standin, broker):
+    ecoflow, stream, updates = _connected_stream(standin, broker)
+    try:
+        unique_id = f"{SERIAL}_{REPORT}_bpSoc_master"
+        battery_id = next(uid for uid in ecoflow._sensors if "JTS1_BP_STA_REPORT" in uid)
+        battery = ecoflow._sensors[battery_id]
+
+        broker.publish(f"/app/device/property/{SERIAL}", {"typeCode": REPORT, "params": {"bpSoc": 42}})
+        sensors = updates.get(timeout=10)
+
+        assert sensors[unique_id].value == 42
+        assert sensors[battery_id] is battery  # other reports are merged from the last parse
+        assert ecoflow.changed_reports == {(SERIAL, REPORT)}
+    finally:
+        stream.disconnect()
+
+
+def test_other_messages_ignored(standin, broker):
+    ecoflow, stream, updates = _connected_stream(standin, broker)
+    try:
+        usage = ecoflow.data_usage
+        broker.publish(f"/app/device/property/{SERIAL}", b"\x08\x01")  # protobuf, left to the poll
+        broker.publish(f"/app/device/property/{SERIAL}", {"typeCode": REPORT, "params": {"bpSoc": 43}})
+        assert updates.get(timeout=10)[f"{SERIAL}_{REPORT}_bpSoc_master"].value == 43
+        assert updates.empty()
+        # both messages are metered, each with its topic
+        assert ecoflow.data_usage - usage > 2 * len(f"/app/device/property/{SERIAL}") + 2
+    finally:
+        stream.disconnect()
+
+
+def test_connection_changes_reported(standin, broker):
+    ecoflow, stream, updates = _connected_stream(standin, broker)
+    try:
+        assert broker.drop() == 1
+        assert updates.get(timeout=10) is False
+        assert updates.get(timeout=30) is True  # reconnected and subscribed again
+    finally:
+        stream.disconnect()
+    assert updates.empty()  # not reported after disconnect
+
+
+def test_disconnect_while_connecting(standin, broker):
+    ecoflow = Ecoflow(SERIAL, "test", "test")
+    _set_api_url(ecoflow, standin.url)
+    ecoflow.authorize()
+    stream = EcoflowStream(ecoflow, lambda sensors: None)
+    stream.disconnect()  # e.g. unloaded before the executor job ran
+    stream.connect()
+    assert stream.client is None
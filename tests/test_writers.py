@@ -0,0 +1,30 @@
+"""Tests of the snapshot writers of the collector (powerocean_core/writers.py)."""
+
+import json
+
+from custom_components.powerocean.powerocean_core.ecoflow import PowerOceanEndPoint
+from custom_components.powerocean.powerocean_core.writers import NdjsonWriter, RotatingFile
+
+
+def _endpoints(serial, value):
+    uid = f"{serial}_bpSoc"
+    return {uid: PowerOceanEndPoint(uid, serial, uid, "bpSoc", value, "%", "bpSoc", None)}
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_rotated_file_repeats_the_catalogs_of_all_serials(tmp_path):
+    path = tmp_path / "out.ndjson"
+    writer = NdjsonWriter(RotatingFile(str(path), max_bytes=400, backups=2))
+    for value in range(6):
+        for serial in ("HJ31A", "HJ31B"):
+            writer.write("2024-01-01T00:00:00", serial, _endpoints(serial, value))
+    writer.close()
+
+    for file in (path, tmp_path / "out.ndjson.1"):
+        lines = _lines(file)
+        catalogs = {line["serial"] for line in lines if line.get("type") == "catalog"}
+        assert catalogs == {"HJ31A", "HJ31B"}, file
+        assert lines[0].get("type") == "catalog"